@@ -23,7 +23,8 @@ class Application(QtWidgets.QMainWindow):
         self.api.styles().add_file("core", "main", "style.qss", priority=0)
         # self.api.csi().set_mask(get_used_subcarriers())
 
-        reader = NexmonCSIStreamReader('0.0.0.0', 9000)
+        reader = NexmonCSIStreamReader('0.0.0.0', 9000, shift_fft=False)   # fftshift is applied by the gather in CSI
+        self.api.csi().set_fft_shift(True)
         self.api.csi().set_reader(reader)
 
         reader_thread = ReaderThread(self.api, reader)
@@ -41,6 +42,7 @@ class Application(QtWidgets.QMainWindow):
         self.timer_prediction = QtCore.QTimer()
 
         self.setup_prediction_settings()
+        self.setup_store_settings()
 
     def start(self):
         # Update plots every 30 ms
@@ -68,3 +70,39 @@ class Application(QtWidgets.QMainWindow):
 
         prediction_settings.on_config_change = on_change
         self.api.settings().add("Predictions", prediction_settings)
+
+    def setup_store_settings(self):
+        csi = self.api.csi()
+        store_settings = Configurable()
+        store_settings.add_config("window_frames", csi.window, 16, 1 << 20)
+        store_settings.add_config("window_s", float(csi.window_seconds), 0.0, 600.0)
+        store_settings.add_config("max_window_frames", csi.max_window, 16, 1 << 20)
+        store_settings.add_config("budget_mb", csi.memory_budget // (1024 * 1024), 16, 65536)
+        store_settings.add_config("idle_timeout_s", int(csi.idle_timeout), 0, 3600)
+        store_settings.add_config("allowlist_only", csi.allowlist_only, False, True)
+        store_settings.add_config("used_subcarriers_only", False, False, True)
+        store_settings.add_config("history", csi.history_enabled, False, True)
+        store_settings.add_config("history_mb", csi.history_max_bytes // (1024 * 1024), 64, 1 << 20)
+
+        def on_change(key, old_value, new_value):
+            if key == "window_frames":
+                csi.set_window(frames=int(new_value))
+            elif key == "window_s":
+                csi.set_window(seconds=float(new_value))
+            elif key == "max_window_frames":
+                csi.set_window(max_frames=int(new_value))
+            elif key == "budget_mb":
+                csi.set_memory_budget(int(new_value) * 1024 * 1024)
+            elif key == "idle_timeout_s":
+                csi.set_idle_timeout(float(new_value))
+            elif key == "allowlist_only":
+                csi.set_allowlist(csi.allowlist, bool(new_value))
+            elif key == "used_subcarriers_only":
+                csi.set_mask(get_used_subcarriers() if new_value else None)
+            elif key == "history":
+                csi.set_history(enabled=bool(new_value))
+            elif key == "history_mb":
+                csi.set_history(max_bytes=int(new_value) * 1024 * 1024)
+
+        store_settings.on_config_change = on_change
+        self.api.settings().add("CSI Store", store_settings)
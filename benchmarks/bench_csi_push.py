@@ -0,0 +1,40 @@
+import time
+import numpy as np
+from services.csi import CSI
+from utils.preprocess import to_db
+
+# Run from the repository root with 'python -m benchmarks.bench_csi_push'
+# Cost of CSI.push with the per-MAC ring buffer vs the previous vstack-and-trim store
+
+def push_vstack(entry, csi, ts, window):
+    raw = csi.reshape(1, -1)
+    entry['raw'] = np.vstack((entry['raw'], raw))[-window:]
+    entry['amp'] = np.vstack((entry['amp'], to_db(raw)))[-window:]
+    entry['phase'] = np.vstack((entry['phase'], np.angle(raw)))[-window:]
+    entry['ts'].append(ts)
+    entry['ts'] = entry['ts'][-window:]
+
+def per_push(fn, frames):
+    start = time.perf_counter()
+    for i, frame in enumerate(frames):
+        fn(frame, float(i))
+    return (time.perf_counter() - start) / len(frames)
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    nfft = 256
+    frames = (rng.standard_normal((512, nfft)) + 1j * rng.standard_normal((512, nfft))).astype(np.complex64)
+
+    for window in [2048, 16384, 131072]:
+        # Fill the window first so both stores run at steady state
+        csi = CSI(window=window)
+        filler = np.resize(frames, (window, nfft))
+        for i, frame in enumerate(filler):
+            csi.push('mac', frame, float(i))
+        ring = per_push(lambda frame, ts: csi.push('mac', frame, ts), np.resize(frames, (4 * window, nfft))[:20000])
+
+        entry = { 'raw': filler.copy(), 'amp': to_db(filler), 'phase': np.angle(filler), 'ts': list(range(window)) }
+        count = max(8, min(512, 2_000_000 // window))
+        vstack = per_push(lambda frame, ts: push_vstack(entry, frame, ts, window), frames[:count])
+
+        print(f"window={window:6d}  vstack {vstack * 1e6:9.1f} us/push  ring {ring * 1e6:6.1f} us/push  speedup {vstack / ring:7.1f}x")
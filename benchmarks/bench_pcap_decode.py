@@ -0,0 +1,52 @@
+import os
+import struct
+import tempfile
+import time
+import numpy as np
+from readers.nexmon._nexmon_fallback import NexmonCSIStreamReader, decode_pcap_batches
+
+# Run from the repository root with 'python -m benchmarks.bench_pcap_decode'
+# Whole-file batch decode vs the per-packet reader, on an evenly spaced capture and on one with a corrupt record
+
+def bench(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def make_capture(packets, nsub=256, corrupt_at=None, seed=0):
+    """Nexmon 43455c0 capture (int16 CSI) from 3 MACs at 1 kHz, with 37 garbage bytes after packet `corrupt_at`."""
+    rng = np.random.default_rng(seed)
+    body = rng.integers(-2000, 2000, size=(packets, 2 * nsub), dtype=np.int16)
+    records = [struct.pack('<IHHIIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)]
+    for i in range(packets):
+        mac = bytes([0xaa, 0xbb, 0xcc, 0, 0, i % 3])
+        payload = b'\x11\x11\xc0\x08' + mac + struct.pack('<HH', 7, 0) + b'\x2a\xe0\xdc\xa6' + body[i].tobytes()
+        udp = struct.pack('!HHHH', 5500, 5500, len(payload) + 8, 0) + payload
+        ip = struct.pack('!BBHHHBBH4s4s', 0x45, 0, 20 + len(udp), 0, 0, 64, 17, 0, b'\x0a\0\0\x01', b'\x0a\0\0\x02')
+        frame = b'\xff' * 6 + mac + b'\x08\x00' + ip + udp
+        records.append(struct.pack('<IIII', 1_700_000_000 + i // 1000, (i % 1000) * 1000, len(frame), len(frame)) + frame)
+        if i == corrupt_at:
+            records.append(rng.integers(0, 256, 37, dtype=np.uint8).tobytes())
+    return b''.join(records)
+
+if __name__ == "__main__":
+    packets = 50_000
+    for name, corrupt_at in [("evenly spaced", None), ("one corrupt record", packets // 2)]:
+        capture = make_capture(packets, corrupt_at=corrupt_at)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "capture.pcap")
+            with open(path, 'wb') as f:
+                f.write(capture)
+
+            reader = NexmonCSIStreamReader(file=path, shift_fft=False, verbose=False)
+            per_packet = bench(lambda: sum(1 for _ in reader), repeat=1)
+            batches = decode_pcap_batches(capture)
+            assert sum(len(batch['csi']) for batch in batches) == packets, "Batch decode lost packets"
+            batched = bench(lambda: decode_pcap_batches(capture))
+            del reader                      # Release the memory map before the file is removed
+
+        print(f"{name:20s}  per-packet {per_packet / packets * 1e6:6.2f} us/pkt  "
+              f"batched {batched / packets * 1e6:6.2f} us/pkt  speedup {per_packet / batched:5.1f}x")
@@ -0,0 +1,43 @@
+import time
+import numpy as np
+from datetime import datetime
+
+# Run from the repository root with 'python -m benchmarks.bench_timestamps'
+# Per-frame timestamp handling of reader → ReaderThread → CSI.push, with datetime objects vs float epoch seconds
+
+def bench(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def datetime_path(stamps):
+    out = []
+    for count, ts in enumerate(stamps):
+        ts = datetime.fromtimestamp(ts)                         # reader
+        out.append(ts.timestamp())                              # CSI.push
+        if count % 500 == 0:
+            ts.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]            # ReaderThread log
+    return out
+
+def float_path(stamps):
+    out = []
+    for count, ts in enumerate(stamps):
+        out.append(float(ts))                                   # CSI.push
+        if count % 500 == 0:
+            datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    return out
+
+if __name__ == "__main__":
+    rate = 2000                                                 # frames per second
+    frames = 60 * rate
+    stamps = [1_700_000_000.0 + i / rate for i in range(frames)]
+    assert np.allclose(datetime_path(stamps), float_path(stamps), rtol=0, atol=1e-6)
+
+    old = bench(lambda: datetime_path(stamps)) / frames
+    new = bench(lambda: float_path(stamps)) / frames
+    print(f"datetime {old * 1e6:6.3f} us/frame ({old * rate * 100:5.2f}% of a core at {rate} Hz)")
+    print(f"float    {new * 1e6:6.3f} us/frame ({new * rate * 100:5.2f}% of a core at {rate} Hz)")
+    print(f"saved    {(old - new) * 1e6:6.3f} us/frame, {old / new:4.1f}x")
@@ -0,0 +1,30 @@
+import time
+import numpy as np
+from readers.nexmon._nexmon_fallback import unpack_float_acphy, AcphyUnpacker
+
+# Run from the repository root with 'python -m benchmarks.bench_unpack_float_acphy'
+
+def bench(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    unpacker = AcphyUnpacker(nbits=10, autoscale=True, nman=12, nexp=6)
+
+    for nfft in [64, 256]:
+        for packets in [1, 64, 2048]:
+            H = rng.integers(0, 2**32, size=(packets, nfft), dtype=np.uint32)
+            out = np.empty((packets, nfft), dtype=np.complex64)
+
+            reference = np.stack([unpack_float_acphy(10, 1, 12, 6, nfft, h).astype(np.float32).view(np.complex64) for h in H])
+            assert np.array_equal(reference.view(np.uint32), unpacker.unpack(H, out=out).view(np.uint32)), "Batch output is not bit-exact"
+
+            per_packet = bench(lambda: [unpack_float_acphy(10, 1, 12, 6, nfft, h).astype(np.float32).view(np.complex64) for h in H])
+            batched = bench(lambda: unpacker.unpack(H, out=out))
+            print(f"nfft={nfft:3d} packets={packets:4d}  per-packet {per_packet / packets * 1e6:7.2f} us/pkt  "
+                  f"batched {batched / packets * 1e6:7.2f} us/pkt  speedup {per_packet / batched:5.1f}x")
@@ -0,0 +1,28 @@
+import numpy as np
+import numpy.typing as npt
+from filters.filter_base import Filter, FilterState
+from utils.preprocess import butter_sos, sosfilt_stream, stream_rate
+
+class BandPass(Filter):
+    name = "Band-pass"
+    description = "Causal Butterworth band-pass on the amplitude of each subcarrier, streamed block by block. Defaults to the breathing band (0.1-0.5 Hz); use e.g. 0.5-10 Hz for body motion. The frame rate is measured per stream from the timestamps."
+    author = "Bellizzi, Gili"
+    version = "1.0.0"
+
+    def __init__(self):
+        super().__init__()
+        self.add_config("low_hz", 0.1, 0.01, 500.0)
+        self.add_config("high_hz", 0.5, 0.02, 500.0)
+        self.add_config("order", 2, 1, 10)
+
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        fs = stream_rate(new_ts, state)
+        if fs is None:
+            return new_amp, new_phase       # First frame, the rate is not known yet
+        try:
+            sos = butter_sos(int(self.get("order")), (float(self.get("low_hz")), float(self.get("high_hz"))), fs, 'band')
+        except ValueError as e:
+            self.warn(state, f"{e}, passing the stream through unfiltered")
+            return new_amp, new_phase
+        self.clear_warning(state)
+        return sosfilt_stream(sos, new_amp, state).astype(np.float32), new_phase
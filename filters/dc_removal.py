@@ -0,0 +1,38 @@
+import numpy as np
+import numpy.typing as npt
+from functools import lru_cache
+from filters.filter_base import Filter, FilterState
+from utils.preprocess import sosfilt_stream, stream_rate
+
+@lru_cache(maxsize=16)
+def dc_blocker_sos(cutoff, fs):
+    """
+    y[n] = x[n] - x[n-1] + pole * y[n-1] as a single second-order section, with the pole placed for a -3 dB
+    cutoff in Hz. Shared, do not modify it.
+    """
+    if not 0 < cutoff < 0.5 * fs:
+        raise ValueError(f"Invalid cutoff {cutoff:g} Hz for a {fs:g} Hz stream, expected 0 < cutoff < {0.5 * fs:g} Hz")
+    pole = np.exp(-2 * np.pi * cutoff / fs)
+    return np.array([[1.0, -1.0, 0.0, 1.0, -pole, 0.0]])
+
+class DCRemoval(Filter):
+    name = "DC Removal"
+    description = "Causal DC blocker removing the static level of each subcarrier amplitude; variations slower than the cutoff are removed too. The frame rate is measured per stream from the timestamps."
+    author = "Bellizzi, Gili"
+    version = "1.0.0"
+
+    def __init__(self):
+        super().__init__()
+        self.add_config("cutoff_hz", 0.05, 0.001, 10.0)
+
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        fs = stream_rate(new_ts, state)
+        if fs is None:
+            return new_amp, new_phase       # First frame, the rate is not known yet
+        try:
+            sos = dc_blocker_sos(float(self.get("cutoff_hz")), fs)
+        except ValueError as e:
+            self.warn(state, f"{e}, passing the stream through unfiltered")
+            return new_amp, new_phase
+        self.clear_warning(state)
+        return sosfilt_stream(sos, new_amp, state).astype(np.float32), new_phase
@@ -1,8 +1,11 @@
 import numpy as np
 import numpy.typing as npt
-from typing import List
+from typing import Any, Dict, List, Tuple
 from utils.configurable import Configurable
 
+FilterState = Dict[str, Any]
+StreamBlock = Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float64], FilterState]    # amp, phase, ts, state
+
 class Filter(Configurable):
     name = "Filter Name"
     description = "A description of the filter."
@@ -20,9 +23,57 @@ class Filter(Configurable):
     def set_enabled(self, enabled: bool):
         self.enabled = enabled
 
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64],
+                state: FilterState) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32]]:
+        """
+        Filter a block of newly pushed rows, new_amp and new_phase (N, S) with new_ts (N,), and return the filtered
+        (amp, phase) rows. Anything needed across blocks (e.g. the previous estimate) goes in `state`, a dict kept
+        by the caller for this filter. The inputs may be modified and returned.
+        The default runs the per-row apply() on the block alone, so filters written for apply() keep working.
+        """
+        self.apply_block(new_amp, new_phase, new_ts, len(new_amp))
+        return new_amp, new_phase
+
+    def process_streams(self, blocks: List[StreamBlock]) -> List[Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32]]]:
+        """
+        Filter new blocks of several streams (MACs) at once, each with its own state, and return their (amp, phase).
+        Each stream appears at most once. The default calls process() per block; filters with per-row recursions
+        can override it to update all streams in one vectorized call per row.
+        """
+        return [self.process(amp, phase, ts, state) for amp, phase, ts, state in blocks]
+
+    def release(self, state: FilterState):
+        """Free resources held by the state of a stream that is gone."""
+        pass
+
     def apply(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: List[float]):
+        """
+        Filter the newest row (amp[-1], phase[-1]) in place. Older rows are shared with published snapshots and must not change.
+        Superseded by process(), which sees only new rows.
+        """
         pass
 
+    def apply_block(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: npt.NDArray[np.float64], count: int):
+        """
+        Apply the filter to the last `count` rows, which were pushed together.
+        The default calls apply() once per row on views ending at that row, so filters written for a single frame keep working.
+        """
+        first = len(amp) - count
+        for end in range(first + 1, len(amp) + 1):
+            self.apply(amp[:end], phase[:end], ts[:end])
+
+    def warn(self, state: FilterState, message: str):
+        """
+        Print a warning about a stream once: it is kept in `state` and only printed again if it changes.
+        Call clear_warning() once the stream is processed normally again.
+        """
+        if state.get('warning') != message:
+            state['warning'] = message
+            print(f"⚠️  {self.name}: {message}")
+
+    def clear_warning(self, state: FilterState):
+        state.pop('warning', None)
+
     def add_performance_time(self, time: float):
         """
         Add a performance tick to the filter's performance tracking.
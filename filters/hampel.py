@@ -0,0 +1,109 @@
+import numpy as np
+import numpy.typing as npt
+from functools import lru_cache
+from typing import List
+from numpy.lib.stride_tricks import sliding_window_view
+from filters.filter_base import Filter, FilterState, StreamBlock
+
+@lru_cache(maxsize=8)
+def shift_table(window: int) -> np.ndarray:
+    """
+    Row a·w + b: offsets (+1, -1 or 0) of the source of each position of a sorted window of length w when the value
+    at position a is removed and a new value is inserted at position b of the remaining ones. Shared, do not modify it.
+    """
+    a, b, p = np.arange(window)[:, None, None], np.arange(window)[None, :, None], np.arange(window)
+    shifts = ((a <= p) & (p < b)).astype(np.int8) - ((b < p) & (p <= a))
+    return shifts.reshape(window * window, window)
+
+def slide_sorted(frames: np.ndarray, ordered: np.ndarray) -> np.ndarray:
+    """
+    Sorted windows (N, S, w) ending at each of the N = len(frames) - w frames after the first w, given `ordered`
+    (S, w), the first w frames sorted per subcarrier. Each frame replaces the oldest value of the window before it:
+    both positions are counted for the whole block at once, and the values in between shift by one, so each window
+    is a single gather of the previous one instead of a sort.
+    """
+    width, window = ordered.shape
+    previous = sliding_window_view(frames[:-1], window, axis=0)         # (N, S, w) window before each new frame
+    old, new = frames[:-window], frames[window:]
+    removed = np.count_nonzero(previous < old[..., None], axis=-1)
+    inserted = np.count_nonzero(previous < new[..., None], axis=-1) - (old < new)
+    index = shift_table(window)[removed * window + inserted] + np.arange(width * window).reshape(width, window)
+    inserted += np.arange(0, width * window, window)                    # flat position in each window
+    windows = np.empty((len(new), width, window), dtype=ordered.dtype)
+    for i in range(len(new)):
+        np.take(ordered, index[i], out=windows[i])
+        windows[i].put(inserted[i], new[i])
+        ordered = windows[i]
+    return windows
+
+def median_mad(ordered: np.ndarray):
+    """
+    Median and MAD along the last axis of windows of odd length w = 2c+1 that are already sorted. The MAD is the
+    (c+1)-th smallest of the deviations median - ordered[c - t] (t = 0…c) and ordered[c + 1 + j] - median
+    (j = 0…c-1), two sorted sequences, so it is found by a binary search over the count t taken from the first.
+    For few windows the per-step overhead of the search dominates and the deviations are partitioned instead.
+    """
+    c = ordered.shape[-1] // 2
+    median = ordered[..., c]
+    if median.size < 1024:
+        deviation = np.abs(ordered - median[..., None])
+        deviation.partition(c, axis=-1)
+        return median, deviation[..., c]
+
+    at = lambda index: np.take_along_axis(ordered, index[..., None], axis=-1)[..., 0]
+    lo, hi = np.ones(median.shape, dtype=np.int64), np.full(median.shape, c + 1, dtype=np.int64)
+    while np.any(lo < hi):
+        mid = (lo + hi + 1) >> 1
+        fits = median - at(c + 1 - mid) <= at(c + 1 + np.minimum(c + 1 - mid, c - 1)) - median
+        lo, hi = np.where(fits, mid, lo), np.where(fits, hi, mid - 1)
+    below = median - at(c + 1 - lo)
+    above = np.where(lo <= c, at(np.minimum(2 * c + 1 - lo, 2 * c)) - median, -np.inf)
+    return median, np.maximum(below, above)
+
+class HampelFilter(Filter):
+    name = "Hampel"
+    description = "Causal Hampel outlier filter: amplitudes more than k-sigma robust deviations (1.4826·MAD) from the median of the last `window` frames of their subcarrier are replaced by that median. The window is made odd."
+    author = "Bellizzi, Gili"
+    version = "1.0.0"
+
+    def __init__(self):
+        super().__init__()
+        self.add_config("window", 11, 3, 101)
+        self.add_config("k_sigma", 3.0, 0.5, 10.0)
+        self.frames = 0                 # rows filtered by the last call, to report the cost per frame
+
+    def process_streams(self, blocks: List[StreamBlock]):
+        self.frames = sum(len(amp) for amp, _, _, _ in blocks)
+        return super().process_streams(blocks)
+
+    def add_performance_time(self, time: float):
+        """Record the cost per frame of the last call."""
+        super().add_performance_time(time / max(self.frames, 1))
+
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        """
+        Each stream keeps the last w input frames and their sorted window per subcarrier in `state`. New frames
+        update the sorted window incrementally (see slide_sorted), then medians and MADs are read from the sorted
+        windows of the whole block at once.
+        """
+        if not len(new_amp):
+            return new_amp, new_phase
+        window = int(self.get("window")) | 1
+        if state.get('sorted') is None or state['sorted'].shape != (new_amp.shape[1], window):
+            # Start as if the first frame had been seen `window` times
+            state['frames'] = np.repeat(new_amp[:1], window, axis=0)
+            state['sorted'] = state['frames'].T.copy()
+
+        threshold = 1.4826 * float(self.get("k_sigma"))
+        frames = np.concatenate((state['frames'], new_amp))
+        chunk = max(1, (1 << 22) // (new_amp.shape[1] * window))        # Bound the sorted windows to ~16 MB
+        for first in range(0, len(new_amp), chunk):
+            ordered = slide_sorted(frames[first:first + chunk + window], state['sorted'])
+            state['sorted'] = ordered[-1].copy()
+            median, mad = median_mad(ordered)
+
+            block = new_amp[first:first + chunk]
+            outlier = np.abs(block - median) > threshold * mad
+            block[outlier] = median[outlier]
+        state['frames'] = frames[len(frames) - window:].copy()
+        return new_amp, new_phase
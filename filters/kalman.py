@@ -1,42 +1,67 @@
 import numpy as np
 import numpy.typing as npt
-from typing import List
-from filters.filter_base import Filter
+from typing import Dict, List
+from filters.filter_base import Filter, FilterState, StreamBlock
 
 class AdaptiveKalman:
-    def __init__(self, q=1.0, r=1.0, alpha=0.05, dim_x=256):
+    """
+    Adaptive Kalman filter with an independent state per subcarrier, for one stream (dim_x,) or for
+    `num_streams` stacked streams (num_streams, dim_x) that can be updated together in one vectorized call.
+    """
+
+    def __init__(self, q=1.0, r=1.0, alpha=0.05, dim_x=256, num_streams=None):
+        shape = (dim_x,) if num_streams is None else (num_streams, dim_x)
         self.alpha = alpha
-        self.q = q
-        self.r = np.ones(dim_x) * r
+        self.q = np.full(shape, q, dtype=np.float64)
+        self.r = np.full(shape, r, dtype=np.float64)
+
+        self.x = np.zeros(shape)
+        self.P = np.ones(shape)
+        self.prev_x = np.zeros(shape)
+        self.steps = np.zeros(shape[:-1], dtype=np.int64)     # updates done per stream
 
-        self.x = None
-        self.P = np.ones(dim_x)
-        self.prev_x = None
+    def update(self, z, streams=None):
+        """
+        Update with one frame per stream: z (dim_x,), or (len(streams), dim_x) for the stacked `streams` (all by default).
+        """
+        rows = Ellipsis if streams is None else streams
+        x, P, q, r, prev_x = self.x[rows], self.P[rows], self.q[rows], self.r[rows], self.prev_x[rows]
+        started = (self.steps[rows] > 0)[..., None]
 
-    def update(self, z):
         # Initialization
-        if self.x is None:
-            self.x = z
+        x = np.where(started, x, z)
 
         # Prediction
-        x_pred = self.x
-        P_pred = self.P + self.q
+        x_pred = x
+        P_pred = P + q
 
         residual = z - x_pred
-        K = P_pred / (P_pred + self.r + 1e-10)   # Avoid division by zero
+        K = P_pred / (P_pred + r + 1e-10)   # Avoid division by zero
 
         # Update
-        self.x = x_pred + K * residual
-        self.P = (1 - K) * P_pred
+        x = x_pred + K * residual
+        P = (1 - K) * P_pred
 
         # Adaptive variance update
-        if self.prev_x is not None:
-            dx = self.x - self.prev_x
-            self.q = (1 - self.alpha) * self.q + self.alpha * dx**2
-            self.r = (1 - self.alpha) * self.r + self.alpha * residual**2
+        dx = x - prev_x
+        q = np.where(started, (1 - self.alpha) * q + self.alpha * dx**2, q)
+        r = np.where(started, (1 - self.alpha) * r + self.alpha * residual**2, r)
+
+        self.x[rows], self.P[rows], self.q[rows], self.r[rows], self.prev_x[rows] = x, P, q, r, x
+        self.steps[rows] += 1
+        return x
+
+    def add_streams(self, count: int) -> int:
+        """Append `count` fresh stacked streams and return the index of the first one."""
+        first = len(self.steps)
+        fresh = AdaptiveKalman(alpha=self.alpha, dim_x=self.x.shape[-1], num_streams=count)
+        for name in ('q', 'r', 'x', 'P', 'prev_x', 'steps'):
+            setattr(self, name, np.concatenate((getattr(self, name), getattr(fresh, name))))
+        return first
 
-        self.prev_x = self.x
-        return self.x
+    def reset_stream(self, stream: int, q=1.0, r=1.0):
+        self.q[stream], self.r[stream], self.x[stream], self.P[stream], self.prev_x[stream] = q, r, 0.0, 1.0, 0.0
+        self.steps[stream] = 0
 
 class KalmanFilter(Filter):
     name = "Adaptive Kalman"
@@ -47,12 +72,58 @@ class KalmanFilter(Filter):
     def __init__(self):
         super().__init__()
         self.add_config("alpha", 0.5, 0.0, 1.0)
-        self.kalman_filter = AdaptiveKalman(alpha=self.get("alpha"), dim_x=256)
+        self.banks : Dict[int, AdaptiveKalman] = {}     # subcarriers → stacked state of all streams with that width
+        self.free : Dict[int, List[int]] = {}           # subcarriers → released stream slots
+
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        return self.process_streams([(new_amp, new_phase, new_ts, state)])[0]
+
+    def process_streams(self, blocks: List[StreamBlock]):
+        """
+        Each stream has a slot in the bank for its width; rows are filtered in lockstep, one vectorized update of the
+        streams that still have rows per step, so N streams cost about as many updates as the longest block.
+        """
+        by_width : Dict[int, List[int]] = {}
+        for i, (amp, _, _, state) in enumerate(blocks):
+            width = amp.shape[1]
+            if state.get('width') != width:
+                self.release(state)
+                state['width'], state['slot'] = width, self.allocate(width)
+            by_width.setdefault(width, []).append(i)
+
+        for width, indices in by_width.items():
+            bank = self.banks[width]
+            bank.alpha = self.get("alpha")
+            order = sorted(indices, key=lambda i: len(blocks[i][0]), reverse=True)
+            slots = np.array([blocks[i][3]['slot'] for i in order])
+            lengths = np.array([len(blocks[i][0]) for i in order])
+
+            # Stack the blocks as (streams, rows, S), longest first, so the streams still active at a step are a prefix
+            stacked = np.zeros((len(order), lengths[0], width), dtype=np.float64)
+            for row, i in enumerate(order):
+                stacked[row, :lengths[row]] = blocks[i][0]
+            contiguous = bool(np.all(np.diff(slots) == 1))      # Slices avoid gathering the state with fancy indexing
+            for step in range(lengths[0]):
+                active = int(np.count_nonzero(lengths > step))
+                streams = slice(slots[0], slots[0] + active) if contiguous else slots[:active]
+                stacked[:active, step] = bank.update(stacked[:active, step], streams)
+            for row, i in enumerate(order):
+                blocks[i][0][:] = stacked[row, :lengths[row]]
+        return [(amp, phase) for amp, phase, _, _ in blocks]
 
-    def apply(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: List[float]):
-        if amp.shape[1] != self.kalman_filter.P.shape[0]:
-            self.kalman_filter = AdaptiveKalman(alpha=self.get("alpha"), dim_x=amp.shape[1])
+    def allocate(self, width: int) -> int:
+        bank = self.banks.get(width)
+        if bank is None:
+            bank = self.banks[width] = AdaptiveKalman(alpha=self.get("alpha"), dim_x=width, num_streams=0)
+        free = self.free.setdefault(width, [])
+        if not free:
+            count = max(len(bank.steps), 4)         # Grow by doubling
+            first = bank.add_streams(count)
+            free.extend(range(first + count - 1, first - 1, -1))
+        slot = free.pop()
+        bank.reset_stream(slot)
+        return slot
 
-        self.kalman_filter.alpha = self.get("alpha")
-        self.kalman_filter.update(amp[-1])
-        amp[-1] = self.kalman_filter.x
+    def release(self, state: FilterState):
+        if 'slot' in state:
+            self.free.setdefault(state['width'], []).append(state.pop('slot'))
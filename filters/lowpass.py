@@ -0,0 +1,27 @@
+import numpy as np
+import numpy.typing as npt
+from filters.filter_base import Filter, FilterState
+from utils.preprocess import butter_sos, sosfilt_stream, stream_rate
+
+class LowPass(Filter):
+    name = "Low-pass"
+    description = "Causal Butterworth low-pass on the amplitude of each subcarrier, streamed block by block. The frame rate is measured per stream from the timestamps."
+    author = "Bellizzi, Gili"
+    version = "1.0.0"
+
+    def __init__(self):
+        super().__init__()
+        self.add_config("cutoff_hz", 3.0, 0.05, 500.0)
+        self.add_config("order", 4, 1, 10)
+
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        fs = stream_rate(new_ts, state)
+        if fs is None:
+            return new_amp, new_phase       # First frame, the rate is not known yet
+        try:
+            sos = butter_sos(int(self.get("order")), float(self.get("cutoff_hz")), fs, 'low')
+        except ValueError as e:
+            self.warn(state, f"{e}, passing the stream through unfiltered")
+            return new_amp, new_phase
+        self.clear_warning(state)
+        return sosfilt_stream(sos, new_amp, state).astype(np.float32), new_phase
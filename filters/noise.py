@@ -1,7 +1,6 @@
 import numpy as np
 import numpy.typing as npt
-from typing import List
-from filters.filter_base import Filter
+from filters.filter_base import Filter, FilterState
 
 class Noise(Filter):
     name = "Noise"
@@ -14,5 +13,6 @@ class Noise(Filter):
         self.add_config("mean", 0.0, -20, 20)
         self.add_config("std", 10.0, 0, 100)
 
-    def apply(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: List[float]):
-        amp[-1] += np.random.normal(self.get("mean"), self.get("std"), size=amp[-1].shape)
+    def process(self, new_amp: npt.NDArray[np.float32], new_phase: npt.NDArray[np.float32], new_ts: npt.NDArray[np.float64], state: FilterState):
+        new_amp += np.random.normal(self.get("mean"), self.get("std"), size=new_amp.shape)
+        return new_amp, new_phase
@@ -72,7 +72,7 @@ class LSTM(HARModel):
 
     def evaluate(self, amp, ts) -> tuple[float, np.ndarray]:
         ts_to = ts[-1]
-        ts_from_idx = np.searchsorted(np.array(ts), ts_to - 3.0)
+        ts_from_idx = np.searchsorted(ts, ts_to - self.window_seconds)
 
         window_amp = amp[ts_from_idx:]
         window_amp = resample(window_amp, PAD_LEN, axis=0)
@@ -1,6 +1,8 @@
 import numpy as np
 
 class HARModel():
+    window_seconds = 3.0    # Seconds of CSI history passed to evaluate()
+
     def __init__(self, num_classes: int):
         self.num_classes = num_classes
 
@@ -11,5 +11,5 @@ class THAT(HARModel):
 
     def evaluate(self, amp, ts) -> tuple[float, np.ndarray]:
         ts_to = ts[-1]
-        ts_from_idx = np.searchsorted(np.array(ts), ts_to - 3.0)
+        ts_from_idx = np.searchsorted(ts, ts_to - self.window_seconds)
         return ts[ts_from_idx], ts_to, softmax(np.random.rand(self.num_classes))
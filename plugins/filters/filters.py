@@ -2,10 +2,11 @@ import qtawesome as qta
 import numpy as np
 from filters.filter_base import Filter
 from plugins.plugin_base import Plugin
+from services.filter_pipeline import DROP_POLICIES
 from utils.visualization import *
 from PySide6.QtCore import Qt, QMargins
 from PySide6.QtWidgets import ( 
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QFrame, QPushButton, QCheckBox, QSpinBox, QDoubleSpinBox
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QScrollArea, QFrame, QPushButton, QCheckBox, QSpinBox, QDoubleSpinBox, QComboBox
 )
 
 class Filters(Plugin):
@@ -47,8 +48,34 @@ class Filters(Plugin):
         show_ms_perf.setToolTip("Show CPU time consumed by each filter on the last 100 render cycles. If disabled, the percentage of CPU usage in relative terms will be shown instead.")
         show_ms_perf.checkStateChanged.connect(lambda state: setattr(self, 'show_ms_perf', state == Qt.Checked) or self.render(0))
         layout.addWidget(show_ms_perf)
+        layout.addWidget(self.create_pipeline_status())
         return panel
 
+    def create_pipeline_status(self):
+        """Queue depth, latency and drop policy of the filter pipeline thread."""
+        pipeline = self.api.csi().pipeline
+        status = QWidget()
+        layout = QVBoxLayout(status, spacing=2, contentsMargins=QMargins(5, 0, 5, 10))
+
+        self.pipeline_queue = QLabel()
+        self.pipeline_queue.setToolTip("Blocks waiting to be filtered (current / max seen / capacity) and blocks published unfiltered because the queue was full.")
+        self.pipeline_latency = QLabel()
+        self.pipeline_latency.setToolTip("Mean time of the last 100 rounds spent ingesting (reader thread), waiting in the queue and running the filters.")
+        layout.addWidget(self.pipeline_queue)
+        layout.addWidget(self.pipeline_latency)
+
+        policy_item = QWidget()
+        policy_layout = QHBoxLayout(policy_item, spacing=0, contentsMargins=QMargins(0, 0, 0, 0))
+        policy_layout.addWidget(QLabel("When full"))
+        policy = QComboBox()
+        policy.addItems(DROP_POLICIES)
+        policy.setCurrentText(pipeline.policy)
+        policy.setToolTip("drop_oldest / drop_newest publish a queued block without filtering, block makes the reader wait.")
+        policy.currentTextChanged.connect(pipeline.set_policy)
+        policy_layout.addWidget(policy)
+        layout.addWidget(policy_item)
+        return status
+
     def add_filter_item(self, filter: Filter, filter_name: str, parent_layout: QVBoxLayout):
         item = QWidget()
         item.setProperty("class", "filter-item")
@@ -89,6 +116,13 @@ class Filters(Plugin):
         self.filter_items[filter_name] = (filter, usage, button)
 
     def render(self, tick):
+        # Filter pipeline
+        csi = self.api.csi()
+        pipeline = csi.pipeline
+        self.pipeline_queue.setText(f"Queue {pipeline.depth()} / {pipeline.max_seen_depth} / {pipeline.max_depth()}, dropped {pipeline.dropped}")
+        self.pipeline_latency.setText(f"Ingest {np.mean(csi.push_ticks) * 1000:.2f}ms, wait {np.mean(pipeline.wait_ticks) * 1000:.1f}ms, "
+                                      f"filter {np.mean(pipeline.filter_ticks) * 1000:.1f}ms")
+
         # Collect performance data for the last 100 calls
         stats = []
         total_time = 0.0
@@ -26,13 +26,13 @@ class EnergyDistribution(Plugin):
         if not self.api.ui().is_dock_visible("Energy Distribution"):
             return
 
-        amp = self.api.csi().get_amp()
+        stats = self.api.csi().get_stats()
         mask = self.api.csi().get_mask()
 
-        energy_per_subcarrier = np.sum(amp**2, axis=0)
+        energy_per_subcarrier = stats['energy']
         total_energy = np.sum(energy_per_subcarrier)
         energy_distribution = energy_per_subcarrier / total_energy if total_energy > 0 else energy_per_subcarrier
-        self.energy_curve.setData(np.arange(-128, 128)[mask], energy_distribution if amp.size > 0 else [])
+        self.energy_curve.setData(np.arange(-128, 128)[mask], energy_distribution if stats['count'] > 0 else [])
 
     def render_schedule(self) -> int:
         """Return the number of render rounds to wait before the next render call."""
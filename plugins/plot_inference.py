@@ -47,8 +47,9 @@ class Inference(Plugin):
         self.highlight_to = points[0].pos().x() if points.size > 0 else None
 
     def render(self, tick):
-        ts = self.api.csi().get_ts()
-        self.inference_plot.getViewBox().setXRange(ts[0], ts[-1], padding=0) if ts else None
+        snapshot = self.api.csi().snapshot()
+        ts = snapshot.ts
+        self.inference_plot.getViewBox().setXRange(ts[0], ts[-1], padding=0) if len(ts) else None
         predictions = self.api.models().get_predictions()
         
         if predictions:
@@ -73,10 +74,10 @@ class Inference(Plugin):
             self.inference.setData(x=[], y=[])
 
         if self.highlight_from is not None and self.highlight_to is not None:
-            amp = self.api.csi().get_amp()
+            amp = snapshot.amp
             highlight = np.zeros_like(amp)
-            pos_x_from = np.searchsorted(ts, self.highlight_from)
-            pos_x_to = np.searchsorted(ts, self.highlight_to)
+            pos_x_from = snapshot.index(self.highlight_from)
+            pos_x_to = snapshot.index(self.highlight_to)
             highlight[pos_x_from:pos_x_to, :] = 1
             self.spect_highlight.setImage(highlight)
             self.spect_highlight.setRect(pg.QtCore.QRectF(ts[0], 0, ts[-1] - ts[0], amp.shape[1]))
@@ -13,6 +13,7 @@ class PlotPhasePlugin(Plugin):
     def __init__(self, api: Api):
         super().__init__(api)
         self.phase_unwrap = True    # Whether to unwrap phase values
+        self.phase_sanitize = False # Whether to remove the linear STO/CFO phase of each frame
     
         win = pg.GraphicsLayoutWidget()
         self.plot_widget = win.addPlot(title="Phase")
@@ -36,8 +37,11 @@ class PlotPhasePlugin(Plugin):
         
         try:
             mask = self.api.csi().subcarrier_mask
-            phase = self.api.csi().get_phase()
-            phase = np.unwrap(phase, axis=0)
+            snapshot = self.api.csi().snapshot()
+            if self.phase_sanitize:
+                phase = snapshot.sanitized_phase
+            else:
+                phase = snapshot.unwrapped_phase if self.phase_unwrap else snapshot.phase
             phase = phase[-1] if phase.size > 0 else phase
             self.phase_curves[0].setData(np.arange(-128, 128)[mask], phase)
 
@@ -34,19 +34,19 @@ class SNRPlugin(Plugin):
         if not self.api.ui().is_dock_visible("SNR"):
             return
 
-        amp = self.api.csi().get_amp()
+        stats = self.api.csi().get_stats()
 
-        if len(amp) < self.window_size:
+        if stats['count'] < self.window_size:
             self.bar_item.setOpts(x=[], height=[], brushes=[])
             return
         
-        mu = np.mean(amp, axis=0)
-        sigma = np.std(amp, axis=0)
+        mu = stats['mean']
+        sigma = np.sqrt(stats['var'])
         snrs = mu / (sigma + 1e-9)
 
         # TODO: this threshold should be configurable
         # Low variance corresponds to null subcarriers 
-        variance = np.var(amp, axis=0)
+        variance = stats['var']
         snrs = np.where(variance < 2, 0.1, snrs)
 
         mask = self.api.csi().get_mask()
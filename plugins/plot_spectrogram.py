@@ -1,7 +1,10 @@
 import numpy as np
 import pyqtgraph as pg
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QScrollBar
 from services.api import Api
 from plugins.plugin_base import Plugin
+from utils.preprocess import to_db
 from utils.visualization import *
 
 class Spectrogram(Plugin):
@@ -27,12 +30,27 @@ class Spectrogram(Plugin):
 
     def add_spectrogram(self, api: Api):
         win = pg.GraphicsLayoutWidget()
-        p1 = win.addPlot(title="CSI Spectrogram", axisItems={'bottom': MinuteSecondAxis(orientation='bottom')})
+        p1 = self.p1 = win.addPlot(title="CSI Spectrogram", axisItems={'bottom': MinuteSecondAxis(orientation='bottom')})
         p1.setLabels(bottom='Time', left='Subcarrier')
         self.spect = pg.ImageItem()
         self.spect.setLookupTable(pg.colormap.get('jet', source='matplotlib').getLookupTable(0, 1, 256))
         p1.addItem(self.spect)
-        api.ui().add_dock("Spectrogram", win, size=(2, 1), position='top')
+
+        # History scroll: at the right end the live window is shown, otherwise an older page of the same duration
+        self.history_scroll = QScrollBar(Qt.Horizontal)
+        self.history_scroll.setRange(0, 1000)
+        self.history_scroll.setValue(1000)
+        self.history_scroll.setToolTip("Scroll back through the on-disk history")
+        self.page_key = None
+        self.page = None
+
+        container = QWidget()
+        layout = QVBoxLayout(container)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+        layout.addWidget(win)
+        layout.addWidget(self.history_scroll)
+        api.ui().add_dock("Spectrogram", container, size=(2, 1), position='top')
         api.ui().add_plot("Spectrogram", p1)
 
     def add_subcarriers_amplitude(self, api: Api):
@@ -72,12 +90,13 @@ class Spectrogram(Plugin):
         self.api.ui().get_dock("Amplitude").raiseDock()
 
     def render(self, tick):
-        amp = self.api.csi().get_amp()
-        ts = self.api.csi().get_ts()
+        snapshot = self.api.csi().snapshot()
+        amp, ts = snapshot.amp, snapshot.ts
         
         # Spectrogram
-        self.spect.setImage(amp, levels=(self.limit_min.value(), self.limit_max.value()))
-        self.spect.setRect(pg.QtCore.QRectF(ts[0], 0, ts[-1] - ts[0], amp.shape[1])) if amp.size > 0 else None
+        page_amp, page_ts = self.get_page(snapshot)
+        self.spect.setImage(page_amp, levels=(self.limit_min.value(), self.limit_max.value()))
+        self.spect.setRect(pg.QtCore.QRectF(page_ts[0], 0, page_ts[-1] - page_ts[0], page_amp.shape[1])) if page_amp.size > 0 else None
 
         # Last CSI amplitude
         self.last_amp.setData(np.arange(-128, 128)[self.api.csi().get_mask()], amp[-1] if amp.size > 0 else [])
@@ -89,6 +108,30 @@ class Spectrogram(Plugin):
             self.history_curves[i].setData(history)
             self.p4.legend.items[i][1].setText(f"Subcarrier {selected_freqs[i]}")
 
+    def get_page(self, snapshot):
+        """
+        Amplitude and timestamps to show: the live window, or an older range of the same duration paged in from
+        the history when scrolled back. Pages are only read again when the scroll position or the MAC changes.
+        """
+        csi = self.api.csi()
+        position = self.history_scroll.value()
+        first = csi.history_start()
+        width = max(int(self.p1.vb.width()), 64)
+        if position == self.history_scroll.maximum() or first is None or len(snapshot) < 2:
+            self.page_key = None
+            decimated = snapshot.decimated(width)    # Pyramid level matching the viewport, constant cost per frame
+            return decimated['mean'], decimated['ts']
+
+        key = (position, csi.selected_mac)
+        if key != self.page_key:
+            span = snapshot.ts[-1] - snapshot.ts[0]
+            last = max(float(snapshot.ts[-1]) - span, first)
+            page_end = first + (last - first) * position / self.history_scroll.maximum() + span
+            page = csi.get_history(page_end - span, page_end, max_frames=width)
+            self.page = (to_db(page['raw']), page['ts'])
+            self.page_key = key
+        return self.page
+
     def render_schedule(self) -> int:
         return 1
     
@@ -35,8 +35,8 @@ class SpectrogramDiff(Plugin):
         if not self.api.ui().is_dock_visible("Spectrogram Diff"):
             return
         
-        amp = self.api.csi().get_amp()
-        ts = self.api.csi().get_ts()
+        snapshot = self.api.csi().snapshot()
+        amp, ts = snapshot.amp, snapshot.ts
         
         amp_diff = np.abs(np.diff(amp, axis=0))
         
@@ -35,8 +35,8 @@ class SuddenChanges(Plugin):
         if not self.api.ui().is_dock_visible("Sudden Changes"):
             return
         
-        amp = self.api.csi().get_amp()
-        ts = self.api.csi().get_ts()
+        snapshot = self.api.csi().snapshot()
+        amp, ts = snapshot.amp, snapshot.ts
 
         sudden_changes = np.abs(np.diff(amp, n=2, axis=0))
         self.sudden_changes.setImage(sudden_changes, autoLevels=len(sudden_changes) > 0)
@@ -53,7 +53,7 @@ class SidebarSettings(Plugin):
                 check.stateChanged.connect(lambda state, k=key: config.set(k, state == Qt.Checked))
                 config_layout.addWidget(check)
 
-            if isinstance(config.get(key), float) or isinstance(config.get(key), int):
+            elif isinstance(config.get(key), float) or isinstance(config.get(key), int):
                 spin = QDoubleSpinBox(singleStep=0.1) if isinstance(config.get(key), float) else QSpinBox()
                 spin.setRange(min_val, max_val)
                 spin.setValue(config.get(key))
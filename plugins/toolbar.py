@@ -79,15 +79,19 @@ class Toolbar(Plugin):
         self.status_label = QLabel("Listening on 0.0.0.0:9000", alignment=QtCore.Qt.AlignVCenter)
         self.status_label.setStyleSheet("margin-left: 0px;")
         self.status_received = QLabel("Received: 0 B", alignment=QtCore.Qt.AlignVCenter)
-        self.status_received.setFixedWidth(130)
+        self.status_received.setFixedWidth(260)
         self.status_window = QLabel("Window: 0", alignment=QtCore.Qt.AlignVCenter)
         self.status_window.setFixedWidth(115)
+        self.status_memory = QLabel("Memory: 0 B", alignment=QtCore.Qt.AlignVCenter)
+        self.status_memory.setFixedWidth(170)
         self.ui_elements.append(toolbar.add_widget(self.status_circle, ToolbarPosition.RightEnd))
         self.ui_elements.append(toolbar.add_widget(self.status_label, ToolbarPosition.RightEnd))
         self.ui_elements.append(toolbar.add_separator(ToolbarPosition.RightEnd))
         self.ui_elements.append(toolbar.add_widget(self.status_received, ToolbarPosition.RightEnd))
         self.ui_elements.append(toolbar.add_separator(ToolbarPosition.RightEnd))
         self.ui_elements.append(toolbar.add_widget(self.status_window, ToolbarPosition.RightEnd))
+        self.ui_elements.append(toolbar.add_separator(ToolbarPosition.RightEnd))
+        self.ui_elements.append(toolbar.add_widget(self.status_memory, ToolbarPosition.RightEnd))
 
     def deactivate(self):
         for element in self.ui_elements:
@@ -148,6 +152,16 @@ class Toolbar(Plugin):
             if self.mac_dropdown.findText(mac) < 0:
                 self.mac_dropdown.addItem(mac)
 
+        # Remove MACs forgotten by the CSI store and show resident bytes per MAC
+        usage = self.api.csi().memory_usage()
+        for i in reversed(range(self.mac_dropdown.count() if self.mac_dropdown.isEnabled() else 0)):
+            mac = self.mac_dropdown.itemText(i)
+            if mac not in macs and i != self.mac_dropdown.currentIndex():
+                self.mac_dropdown.removeItem(i)
+                continue
+            stored = human_readable_bytes(usage[mac]) if mac in usage else "not stored"
+            self.mac_dropdown.setItemData(i, f"{mac}: {stored}", QtCore.Qt.ToolTipRole)
+
         # Add models to dropdown
         for model in self.api.models().get_models():
             if self.model_dropdown.findText(model.get_name()) < 0:
@@ -155,8 +169,18 @@ class Toolbar(Plugin):
 
         # Listening status
         self.status_label.setText(f"Listening on {host}:{port}")
-        self.status_received.setText(f"Received: {human_readable_bytes(len(self.api.csi().reader.receiver.data))}")
+        reader = self.api.csi().reader
+        receiver = reader.receiver
+        packets_per_sec, bytes_per_sec = receiver.rates()
+        self.status_received.setText(f"Received: {human_readable_bytes(receiver.retained_bytes())} / {human_readable_bytes(receiver.total_bytes)} ({packets_per_sec:.0f} pkt/s)")
+        self.status_received.setToolTip(f"Retained in memory / total received\n{packets_per_sec:.0f} packets/s, {human_readable_bytes(bytes_per_sec)}/s\n"
+                                        f"Resyncs: {reader.resync_count}, skipped {human_readable_bytes(reader.skipped_bytes)}")
         self.status_window.setText(f"Window: {len(ts_data)}  ")
+        csi = self.api.csi()
+        self.status_memory.setText(f"Memory: {human_readable_bytes(sum(usage.values()))} / {human_readable_bytes(csi.memory_budget)}")
+        top = sorted(usage.items(), key=lambda item: item[1], reverse=True)[:10]
+        self.status_memory.setToolTip(f"Resident CSI bytes for {len(usage)} stored of {len(macs)} seen MACs, {csi.evicted} evicted\n" +
+                                      "\n".join(f"{mac}: {human_readable_bytes(nbytes)}" for mac, nbytes in top))
         if self.api.csi().reader.receiver.is_paused:
             self.status_circle.setStyleSheet("background-color: red; border-radius: 6px;")
         else:
@@ -3,8 +3,10 @@ import logging
 logger = logging.getLogger(__name__)
 
 class NexmonCSIStreamReader:
-    def __init__(self, host='0.0.0.0', port=5500, file=None, simulate_time=False, shift_fft=True, verbose=True, ts_as_datetime=True): ...
+    def __init__(self, host='0.0.0.0', port=5500, file=None, simulate_time=False, shift_fft=True, verbose=True, ts_as_datetime=False, batch_decode=False,
+                 max_buffer_bytes=None, spill_dir=None): ...
     def get_name(self) -> str : ...
+    def has_pending(self) -> bool : ...
     def __iter__(self): ...
 
 try:
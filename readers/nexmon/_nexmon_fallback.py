@@ -1,6 +1,10 @@
-from typing import Dict
+from typing import Dict, List, Optional, TypedDict
 import numpy as np
+import numpy.typing as npt
 import io
+from collections import deque
+import mmap
+import shutil
 import struct
 from datetime import datetime, timedelta
 import socket
@@ -25,18 +29,27 @@ S_UDP         = struct.Struct('!HHHH')           # (8) UDP
 S_CHAR_SIGNED = struct.Struct('b')               # (2) signed char
 S_CHAR        = struct.Struct('B')               # (2) unsigned char
 
+PCAP_CSI_OFFSET = S_PCAP_PKT.size + S_ETH.size + S_IP_MIN.size + S_UDP.size   # (58) Nexmon payload start within a record
+NEXMON_HEADER_SIZE = 18                                                       # (18) Nexmon header before the CSI samples
+
+PCAP_INDEX_DTYPE = np.dtype([('offset', '<i8'), ('ts', '<f8')])   # Sidecar index record: packet header offset and timestamp
+
 MAC_CACHE : Dict[bytes, str] = {}               # MACs cache for faster formatting
+MAC_CACHE_SIZE = 4096                           # Oldest entries are dropped beyond this, MACs passing by must not grow it forever
 
 def format_mac(mac_bytes: bytes) -> str:
+    mac_bytes = bytes(mac_bytes)    # memoryview slices are not hashable
     if mac_bytes in MAC_CACHE:
         return MAC_CACHE[mac_bytes]
     
     h = mac_bytes.hex()
     mac_str = ':'.join(h[i:i+2] for i in range(0, 12, 2))
+    if len(MAC_CACHE) >= MAC_CACHE_SIZE:
+        del MAC_CACHE[next(iter(MAC_CACHE))]
     MAC_CACHE[mac_bytes] = mac_str
     return mac_str
 
-def read_exact(input, length) -> bytes:
+def read_exact(input, length):
     bytes = input.read(length)
     if len(bytes) != length:
         raise EOFError(f'Reached end of file before reading the expected number of bytes: {bytes.hex()}')
@@ -117,19 +130,16 @@ def read_nexmon_csi(input, length, verbose=False):
     sequence_no = int.from_bytes(data[10:12], byteorder="little")       # unsigned int
     coreSpatialVal = int.from_bytes(data[12:14], byteorder="little")    # unsigned int
     channel_spec = data[14:16].hex()                                    # string
-    chip = CHIPS[data[16:18].hex()]          
+    chip_id = data[16] | (data[17] << 8)                                # unsigned int little endian
     num_subcarriers = (len(data) - 18) // 4
-    csi_data_raw = data[18:]                                
-    
-    if chip in ["4339", "43455c0"]:
-        csi = np.frombuffer(csi_data_raw, dtype=np.int16)  # Convert bytes → int16 array    
-    elif chip == "4366c0":
-        csi = np.frombuffer(csi_data_raw, dtype=np.uint32)  # Convert bytes → float16 array
-        csi = unpack_float_acphy(10, 1, 12, 6, num_subcarriers, csi)
-    else:
-        raise Exception(f'Unsupported chip: "{chip}"')
-    
-    csi = csi.astype(np.float32).view(np.complex64)
+    csi_data_raw = data[18:]
+
+    # Unsupported chips are skipped, the whole payload has already been consumed
+    decoder = get_decoder(chip_id)
+    csi = None
+    if decoder is not None:
+        samples = np.frombuffer(data, dtype=np.uint8, count=num_subcarriers * 4, offset=18).reshape(1, -1)
+        csi = decoder.decode(samples)[0]
 
     if verbose:
         print(f'\nNexmon CSI Packet ({len(data)} bytes)', data.hex())
@@ -140,9 +150,9 @@ def read_nexmon_csi(input, length, verbose=False):
         print('  Sequence No:        ', sequence_no)
         print('  Core Spatial Stream:', coreSpatialVal)
         print('  Channel Spec:       ', channel_spec)
-        print('  Chip:               ', chip)
+        print('  Chip:               ', CHIPS.get(f'{chip_id & 0xff:02x}{chip_id >> 8:02x}', hex(chip_id)))
         print('  Number of Subcarriers:', num_subcarriers)
-        print('  CSI Data:            ', len(csi_data_raw), 'bytes', len(csi), 'complex values')
+        print('  CSI Data:            ', len(csi_data_raw), 'bytes', 0 if csi is None else len(csi), 'complex values')
 
     return csi, mac
 
@@ -207,87 +217,481 @@ def unpack_float_acphy(
 
     return vals * sign
 
+class AcphyUnpacker:
+    """
+    Batched `unpack_float_acphy`: decodes an (N, nfft) block of packed floats in one call.
+    Results are bit-exact with the per-packet function, including its per-packet autoscale.
+    Work buffers are allocated once and reused while the block does not grow, so an instance must not be shared across threads.
+    """
+
+    def __init__(self, nbits: int, autoscale: bool, nman: int, nexp: int):
+        self.nbits = nbits
+        self.autoscale = autoscale
+        self.nman = nman
+        self.nexp = nexp
+        self._work : Dict[str, np.ndarray] = {}
+
+    def _buffers(self, n: int, nfft: int) -> Dict[str, np.ndarray]:
+        work = self._work
+        if not work or work['h'].shape[0] < n or work['h'].shape[1] != nfft:
+            shape = (max(n, 2 * work['h'].shape[0] if work else n), nfft)
+            work = self._work = {
+                'h': np.empty(shape, np.int64), 'v': np.empty(shape, np.int64), 'e': np.empty(shape, np.int64),
+                'rs': np.empty(shape, np.int64), 'ls': np.empty(shape, np.int64), 'tmp': np.empty(shape, np.int64),
+                'mant': np.empty(shape, np.float64), 'bits': np.empty(shape, np.int32),
+                'neg': np.empty(shape, bool), 'zero': np.empty(shape, bool), 'sign': np.empty(shape, bool),
+            }
+        return { key: buffer[:n] for key, buffer in work.items() }
+
+    def unpack(self, H: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+        """
+        H  : (N, nfft) uint32 array of packed CSI values
+        out: optional (N, nfft) complex64 array to write into
+        """
+        n, nfft = H.shape
+        out = np.empty((n, nfft), dtype=np.complex64) if out is None else out
+        w = self._buffers(n, nfft)
+        h, v, e, rs, ls, tmp = w['h'], w['v'], w['e'], w['rs'], w['ls'], w['tmp']
+        nman, nexp = self.nman, self.nexp
+
+        # --- constant masks ----------------------------------------------------
+        iq_mask   = (1 << (nman - 1)) - 1
+        e_mask    = (1 << nexp) - 1
+        e_p       = 1 << (nexp - 1)
+        sgnr_mask = 1 << (nexp + 2 * nman - 1)
+        sgni_mask = sgnr_mask >> nman
+
+        # --- raw exponents, sign-extended --------------------------------------
+        np.copyto(h, H, casting='unsafe')
+        np.bitwise_and(h, e_mask, out=e)
+        np.bitwise_xor(e, e_p, out=e)
+        np.subtract(e, e_p, out=e)
+
+        # --- per-packet autoscale: largest exponent + mantissa bit length ------
+        if self.autoscale:
+            np.right_shift(h, nexp + nman, out=tmp)
+            np.right_shift(h, nexp, out=v)
+            np.bitwise_or(tmp, v, out=tmp)
+            np.bitwise_and(tmp, iq_mask, out=tmp)
+            np.maximum(tmp, 1, out=tmp)
+            np.frexp(tmp, out=(w['mant'], w['bits']))      # floor(log2(x)) == frexp exponent - 1
+            np.add(e, w['bits'], out=tmp)
+            maxbit = tmp.max(axis=1, initial=-e_p) - 1
+        else:
+            maxbit = e.max(axis=1, initial=-e_p)
+
+        # --- scale exponents and split into right/left shifts ------------------
+        np.add(e, (self.nbits - maxbit)[:, None], out=e)
+        np.less(e, 0, out=w['neg'])
+        np.less(e, -nman, out=w['zero'])
+        np.negative(e, out=rs)
+        np.maximum(rs, 0, out=rs)
+        np.maximum(e, 0, out=ls)
+
+        # --- scale mantissas and restore sign, I then Q ------------------------
+        values = out.view(np.float32)
+        for column, shift, sign_mask in ((0, nexp + nman, sgnr_mask), (1, nexp, sgni_mask)):
+            np.right_shift(h, shift, out=v)
+            np.bitwise_and(v, iq_mask, out=v)
+            np.right_shift(v, rs, out=tmp)
+            np.left_shift(v, ls, out=v)
+            np.copyto(v, tmp, where=w['neg'])
+            np.copyto(v, 0, where=w['zero'])
+            np.bitwise_and(h, sign_mask, out=tmp)
+            np.not_equal(tmp, 0, out=w['sign'])
+            np.negative(v, out=v, where=w['sign'])
+            values[:, column::2] = v
+
+        return out
+
+ACPHY_4366C0 = AcphyUnpacker(nbits=10, autoscale=True, nman=12, nexp=6)
+ACPHY_4358 = AcphyUnpacker(nbits=10, autoscale=True, nman=9, nexp=5)
+
+class ChipDecoder:
+    """
+    Converts the CSI samples of Nexmon payloads (the bytes after the 18-byte header) into complex64 subcarriers.
+    Add support for a new chip by subclassing and calling `register_decoder`.
+    """
+
+    def decode(self, samples: np.ndarray, shift_fft: bool = False) -> np.ndarray:
+        """
+        samples: (N, 4*S) uint8 rows, one per packet. Returns an (N, S) complex64 array.
+        """
+        raise NotImplementedError
+
+class Int16Decoder(ChipDecoder):
+    """
+    Interleaved int16 I/Q samples (4339, 43455c0).
+    """
+
+    def decode(self, samples: np.ndarray, shift_fft: bool = False) -> np.ndarray:
+        num_subcarriers = samples.shape[1] // 4
+        csi = np.empty((len(samples), num_subcarriers), dtype=np.complex64)
+        iq, out = samples.view(np.int16), csi.view(np.float32)
+        half = 2 * (num_subcarriers // 2) if shift_fft else 0     # fftshift fused with the conversion
+        out[:, half:] = iq[:, :iq.shape[1] - half]
+        out[:, :half] = iq[:, iq.shape[1] - half:]
+        return csi
+
+class AcphyDecoder(ChipDecoder):
+    """
+    Packed floats, one uint32 per subcarrier (4366c0, 4358).
+    """
+
+    def __init__(self, unpacker: AcphyUnpacker):
+        self.unpacker = unpacker
+
+    def decode(self, samples: np.ndarray, shift_fft: bool = False) -> np.ndarray:
+        csi = np.empty((len(samples), samples.shape[1] // 4), dtype=np.complex64)
+        self.unpacker.unpack(samples.view(np.uint32), out=csi)
+        if shift_fft:
+            csi = np.fft.fftshift(csi, axes=1)
+        return csi
+
+DECODERS : Dict[str, ChipDecoder] = {
+    "4339": Int16Decoder(),
+    "43455c0": Int16Decoder(),
+    "4358": AcphyDecoder(ACPHY_4358),
+    "4366c0": AcphyDecoder(ACPHY_4366C0),
+}
+
+DECODER_CACHE : Dict[int, Optional[ChipDecoder]] = {}   # Chip id → decoder, resolved once per chip
+
+def register_decoder(chip: str, decoder: ChipDecoder):
+    DECODERS[chip] = decoder
+    DECODER_CACHE.clear()
+
+def get_decoder(chip_id: int) -> Optional[ChipDecoder]:
+    """
+    Return the decoder for a little-endian chip id from the Nexmon header, or None if the chip is not supported.
+    """
+    if chip_id in DECODER_CACHE:
+        return DECODER_CACHE[chip_id]
+
+    chip = CHIPS.get(f'{chip_id & 0xff:02x}{chip_id >> 8:02x}')
+    decoder = DECODERS.get(chip)
+    if decoder is None:
+        print(f" [!] Unsupported chip {chip or hex(chip_id)}, its packets will be skipped")
+    DECODER_CACHE[chip_id] = decoder
+    return decoder
+
+RESYNC_CHUNK_SIZE = 16 * 1024   # Bytes inspected per resync step
+
+def find_packet_header(chunk, max_ts: int, eof: bool = False) -> int:
+    """
+    Return the offset of the first plausible PCAP packet header in `chunk`, or -1 if there is none.
+    Every byte offset is checked at once on NumPy views (ts range, usec < 1e6, incl_len <= orig_len), and a candidate
+    is rejected when the header it points to (offset + 16 + incl_len) lies within the chunk and is not valid itself.
+    With `eof`, a candidate whose record ends exactly at the end of the chunk is also confirmed.
+    """
+    data = np.frombuffer(chunk, dtype=np.uint8)
+    if len(data) < S_PCAP_PKT.size:
+        return -1
+
+    # Little-endian uint32 starting at every byte offset
+    words = np.empty(len(data) - 3, dtype=np.uint32)
+    for k in range(4):
+        count = len(words[k::4])
+        words[k::4] = np.frombuffer(data, dtype='<u4', count=count, offset=k)
+
+    n = len(words) - 12
+    ts_sec, ts_usec, incl_len, orig_len = words[:n], words[4:n + 4], words[8:n + 8], words[12:n + 12]
+    valid = ((ts_sec >= 2000) & (ts_sec <= max_ts) & (ts_usec < 1_000_000) &
+             (incl_len > 0) & (incl_len <= orig_len) & (orig_len <= 65535))
+
+    candidates = np.flatnonzero(valid)
+    if len(candidates) == 0:
+        return -1
+
+    # Confirm candidates by chaining to the next header
+    successors = candidates + S_PCAP_PKT.size + incl_len[candidates].astype(np.int64)
+    checkable = successors < n
+    rejected = checkable & ~valid[np.minimum(successors, n - 1)]
+    if eof:
+        rejected &= successors != len(data)
+        rejected |= successors > len(data)
+    accepted = candidates[~rejected]
+    return int(accepted[0]) if len(accepted) else -1
+
 def resync_to_next_packet(input):
     """
-    Resync to the next valid PCAP packet header by scanning byte-by-byte.
-    Uses sanity checks on ts_sec, ts_usec, incl_len, and orig_len.
+    Resync to the next valid PCAP packet header, scanning a chunk at a time with `find_packet_header`.
+    The bytes already available are scanned first, so a live stream only waits for more data when they hold no header.
+    Returns the number of bytes skipped.
     """
-    packet_header_size = 16
     max_seek_bytes = 10 * 1024 * 1024  # Avoid infinite loops on corrupted files
-    bytes_scanned = 0
+    max_ts = int(time.time()) + 3600
+    start = pos = input.tell()
+
+    while pos - start <= max_seek_bytes:
+        size = max(min(input.available(), RESYNC_CHUNK_SIZE), S_PCAP_PKT.size)
+        chunk = input.read(size)
+        eof = len(chunk) < size
+        found = find_packet_header(chunk, max_ts, eof)
 
-    while True:
-        pos = input.tell()
-        data = input.read(packet_header_size)
-        if len(data) < packet_header_size:
+        if found >= 0:
+            input.seek(pos + found)
+            return pos + found - start
+        if eof:
             raise EOFError("Reached end of file during resync")
 
-        try:
-            ts_sec, ts_usec, incl_len, orig_len = struct.unpack('<IIII', data)
-
-            now = int(time.time())
-            # Sanity checks:
-            if (
-                2000 <= ts_sec <= now + 3600 and   # reasonable UNIX timestamp (2000+)
-                0 <= ts_usec < 1_000_000 and       # microseconds range
-                0 < incl_len <= 65535 and
-                0 < orig_len <= 65535 and
-                incl_len <= orig_len
-            ):
-                # Looks like a valid packet header
-                input.seek(pos)
-                return bytes_scanned
-        except struct.error:
-            pass
+        # Keep the last bytes, a header may straddle the chunk boundary
+        pos += len(chunk) - S_PCAP_PKT.size + 1
+        input.seek(pos)
 
-        # Move forward by 1 byte
-        input.seek(pos + 1)
-        bytes_scanned += 1
+    raise RuntimeError("Resync failed after scanning too many bytes")
 
-        if bytes_scanned > max_seek_bytes:
-            raise RuntimeError("Resync failed after scanning too many bytes")
+class CSIBatch(TypedDict):
+    chip: str                               # chip name, e.g. "43455c0"
+    index: npt.NDArray[np.int64]            # packet ordinal within the capture, shape (N,)
+    ts: npt.NDArray[np.float64]             # epoch seconds, shape (N,)
+    mac: npt.NDArray[np.object_]            # formatted source MACs, shape (N,)
+    csi: npt.NDArray[np.complex64]          # CSI samples in FFT order, shape (N, S)
+
+def find_packet_offsets(buffer, start=S_PCAP_HEAD.size) -> npt.NDArray[np.int64]:
+    """
+    Walk the PCAP record chain once over a memoryview and return the byte offset of every complete packet header.
+    Records failing the same sanity checks as `resync_to_next_packet` are skipped with `find_packet_header`.
+    Runs of equally sized records (the usual case) are validated in blocks with NumPy instead of one by one.
+    """
+    view = memoryview(buffer)
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    end = len(view)
+    max_ts = int(time.time()) + 3600
+    unpack_from = S_PCAP_PKT.unpack_from
+    header_size = S_PCAP_PKT.size
+    chunks, singles = [], []
+    pos, last_step, same, run = start, 0, 0, 64
+
+    while pos + header_size <= end:
+        ts_sec, ts_usec, incl_len, orig_len = unpack_from(view, pos)
+        if not (2000 <= ts_sec <= max_ts and ts_usec < 1_000_000 and 0 < incl_len <= orig_len <= 65535):
+            # Corrupted record, scan for the next header
+            chunk = view[pos + 1:pos + 1 + RESYNC_CHUNK_SIZE]
+            found = find_packet_header(chunk, max_ts, eof=pos + 1 + len(chunk) >= end)
+            pos = pos + 1 + found if found >= 0 else pos + 1 + max(len(chunk) - header_size + 1, 1)
+            continue
+
+        step = header_size + incl_len
+        if pos + step > end:
+            break                                   # Truncated last record
+
+        same = same + 1 if step == last_step else 0
+        last_step = step
+        if same < 8:
+            singles.append(pos)
+            pos += step
+            continue
+
+        # Validate a whole run of records with the same size at once
+        count = min(run, (end - pos) // step)
+        run_offsets = pos + step * np.arange(count, dtype=np.int64)
+        headers = np.ascontiguousarray(gather_rows(data, run_offsets, header_size)).view(np.uint32)
+        ok = ((headers[:, 0] >= 2000) & (headers[:, 0] <= max_ts) & (headers[:, 1] < 1_000_000) &
+              (headers[:, 2] == incl_len) & (headers[:, 3] >= incl_len) & (headers[:, 3] <= 65535))
+        valid = count if ok.all() else int(np.argmin(ok))
+
+        if singles:
+            chunks.append(np.array(singles, dtype=np.int64))
+            singles = []
+        chunks.append(run_offsets[:valid])
+        pos += valid * step
+        run, same = (min(run * 2, 1 << 16), same) if valid == count else (64, 0)
+
+    if singles:
+        chunks.append(np.array(singles, dtype=np.int64))
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+def gather_rows(data: npt.NDArray[np.uint8], offsets: npt.NDArray[np.int64], length: int) -> npt.NDArray[np.uint8]:
+    """
+    Gather `length` bytes starting at every offset into an (N, length) uint8 array.
+    Evenly spaced records (the usual case for single-bandwidth captures) are returned as a zero-copy strided view.
+    Otherwise each evenly spaced run (e.g. between two corrupt regions) is copied from a strided view, and only
+    records in short runs are fancy-indexed.
+    """
+    if len(offsets) == 0:
+        return np.empty((0, length), dtype=np.uint8)
+
+    steps = np.diff(offsets)
+    if len(offsets) == 1 or (steps[0] > 0 and np.all(steps == steps[0])):
+        step = int(steps[0]) if len(steps) else length
+        return np.lib.stride_tricks.as_strided(data[offsets[0]:], shape=(len(offsets), length), strides=(step, 1), writeable=False)
+
+    # Runs of equal steps: steps[first:last] are equal, so rows first…last are evenly spaced
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(steps)) + 1, [len(steps)]))
+    firsts, lasts = bounds[:-1], bounds[1:]
+    long_runs = (lasts - firsts >= 8) & (steps[firsts] > 0)
+
+    out = np.empty((len(offsets), length), dtype=np.uint8)
+    scattered = np.ones(len(offsets), dtype=bool)
+    for first, last in zip(firsts[long_runs], lasts[long_runs]):
+        out[first:last + 1] = np.lib.stride_tricks.as_strided(data[offsets[first]:], shape=(last + 1 - first, length),
+                                                              strides=(int(steps[first]), 1), writeable=False)
+        scattered[first:last + 1] = False
+
+    # Remaining records: fancy-index in chunks to bound the size of the index array
+    rows = np.flatnonzero(scattered)
+    cols = np.arange(length)
+    chunk = max(1, (1 << 22) // max(length, 1))
+    for i in range(0, len(rows), chunk):
+        out[rows[i:i + chunk]] = data[offsets[rows[i:i + chunk], None] + cols]
+    return out
+
+def decode_pcap_batches(buffer, offsets=None, shift_fft=False) -> List[CSIBatch]:
+    """
+    Decode every Nexmon CSI packet of an in-memory PCAP capture at once.
+    Packets are grouped by chip and payload length, and each group is decoded into a preallocated (N, S) complex64 array
+    with parallel packet index, timestamp and MAC columns. Unsupported chips and malformed records are dropped.
+    With `shift_fft` the zero frequency is moved to the center while converting, without an extra pass.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    offsets = find_packet_offsets(buffer) if offsets is None else np.asarray(offsets, dtype=np.int64)
+    index = np.arange(len(offsets), dtype=np.int64)
+
+    # Keep records large enough to hold the Ethernet, IP, UDP and Nexmon headers
+    pcap_headers = np.ascontiguousarray(gather_rows(data, offsets, S_PCAP_PKT.size)).view(np.uint32)
+    incl_len = pcap_headers[:, 2].astype(np.int64)
+    keep = incl_len >= PCAP_CSI_OFFSET - S_PCAP_PKT.size + NEXMON_HEADER_SIZE
+    offsets, index, pcap_headers, incl_len = offsets[keep], index[keep], pcap_headers[keep], incl_len[keep]
+
+    headers = gather_rows(data, offsets, PCAP_CSI_OFFSET + NEXMON_HEADER_SIZE)
+    udp_len = (headers[:, PCAP_CSI_OFFSET - 4].astype(np.int64) << 8) | headers[:, PCAP_CSI_OFFSET - 3]
+    payload_len = udp_len - S_UDP.size
+    keep = (payload_len >= NEXMON_HEADER_SIZE) & (udp_len + S_ETH.size + S_IP_MIN.size <= incl_len)
+    offsets, index, pcap_headers, headers, payload_len = offsets[keep], index[keep], pcap_headers[keep], headers[keep], payload_len[keep]
+
+    ts = pcap_headers[:, 0] + pcap_headers[:, 1] * 1e-6
+    chip_id = headers[:, PCAP_CSI_OFFSET + 16].astype(np.int64) | (headers[:, PCAP_CSI_OFFSET + 17].astype(np.int64) << 8)
+    mac_id = np.zeros(len(offsets), dtype=np.uint64)
+    for i in range(6):
+        mac_id = (mac_id << np.uint64(8)) | headers[:, PCAP_CSI_OFFSET + 4 + i]
+
+    batches : List[CSIBatch] = []
+    keys = (chip_id << 16) | payload_len
+    for key in np.unique(keys):
+        chip_id = int(key >> 16)
+        decoder = get_decoder(chip_id)
+        if decoder is None:
+            continue
+
+        rows = keys == key
+        num_subcarriers = (int(key & 0xffff) - NEXMON_HEADER_SIZE) // 4
+        samples = gather_rows(data, offsets[rows] + PCAP_CSI_OFFSET + NEXMON_HEADER_SIZE, num_subcarriers * 4)
+        csi = decoder.decode(samples, shift_fft)
+        chip = CHIPS.get(f'{chip_id & 0xff:02x}{chip_id >> 8:02x}')
+
+        macs, inverse = np.unique(mac_id[rows], return_inverse=True)
+        names = np.array([format_mac(int(m).to_bytes(6, 'big')) for m in macs], dtype=object)
+        batches.append({ 'chip': chip, 'index': index[rows], 'ts': ts[rows], 'mac': names[inverse], 'csi': csi })
+
+    return batches
 
 class UDPStreamReceiver:
-    """Receives UDP packets, stores all data in memory, and supports random access with seek/tell."""
+    """
+    Receives UDP packets, stores the data in memory, and supports random access with seek/tell.
+    Datagrams are drained in batches with recv_into straight into a preallocated buffer, and read() returns
+    memoryview slices of it, so consumers must not keep them across reads.
+    With `max_buffer_bytes` the in-memory buffer is bounded: data already consumed by the reader is dropped
+    (or spilled to rotating segment files in `spill_dir`) once the cap is exceeded. Positions are absolute stream offsets.
+    """
 
-    def __init__(self, host='0.0.0.0', port=5500, max_packet_size=65535, receive_buffer_size_mb=32):
+    def __init__(self, host='0.0.0.0', port=5500, max_packet_size=65535, receive_buffer_size_mb=32,
+                 max_buffer_bytes=None, spill_dir=None, spill_segment_bytes=64 * 1024 * 1024, spill_max_segments=16):
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_size_mb * 1024 * 1024)
         self.sock.bind((host, port))
 
         self.max_packet_size = max_packet_size
-        self.data = bytearray()  # store all received data
+        self.buffer = bytearray(max(1 << 20, 2 * max_packet_size))  # preallocated receive buffer
+        self.view = memoryview(self.buffer)
+        self.start = 0           # retained data is buffer[start:end]
+        self.end = 0
+        self.base = 0            # stream position of buffer[start]
         self.pos = 0             # current read position
+        self.released = 0        # stream position before which data may be dropped (a packet boundary)
+        self.boundaries = deque()    # released packet boundaries not dropped yet, oldest first
+        self.header = b''        # PCAP global header, kept so saved files stay valid after dropping data
+        self.total_bytes = 0     # bytes stored since the last clear
         self.is_paused = False
 
-    def read(self, size: int) -> bytes:
+        # Throughput counters
+        self.packets_received = 0
+        self.bytes_received = 0
+        self._rates = (0.0, 0.0)
+        self._rates_sample = (time.perf_counter(), 0, 0)
+
+        self.max_buffer_bytes = max_buffer_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.spill_segment_bytes = spill_segment_bytes
+        self.spill_max_segments = spill_max_segments
+        self.spill_segments : List[list] = []   # [path, start, end] stream ranges of spilled data, oldest first
+        self.spill_count = 0
+
+    @property
+    def data(self) -> memoryview:
+        """The retained data."""
+        return self.view[self.start:self.end]
+
+    def read(self, size: int) -> memoryview:
         # Fill buffer until enough bytes are available from current pos
-        while len(self.data) < self.pos + size:
-            packet, _ = self.sock.recvfrom(self.max_packet_size)
-            if not self.is_paused:
-                self.data.extend(packet)
+        while self.base + self.end - self.start < self.pos + size:
+            self._receive()
 
         # Read from current position
-        result = self.data[self.pos:self.pos + size]
+        offset = self.start + self.pos - self.base
         self.pos += size
-        return bytes(result)
+        return self.view[offset:offset + size]
 
     def tell(self) -> int:
         return self.pos
-    
+
+    def release(self, pos: int):
+        """Mark `pos` as a packet boundary: data before it has been consumed and may be dropped."""
+        self.released = pos
+        if self.max_buffer_bytes:
+            self.boundaries.append(pos)
+
+    def retained_bytes(self) -> int:
+        """Bytes currently held in memory."""
+        return self.end - self.start
+
+    def available(self) -> int:
+        """Bytes received but not read yet."""
+        return self.base + self.end - self.start - self.pos
+
+    def rates(self) -> tuple[float, float]:
+        """Packets/sec and bytes/sec received, averaged over the last second."""
+        now = time.perf_counter()
+        last, packets, nbytes = self._rates_sample
+        if now - last >= 1.0:
+            self._rates = ((self.packets_received - packets) / (now - last), (self.bytes_received - nbytes) / (now - last))
+            self._rates_sample = (now, self.packets_received, self.bytes_received)
+        return self._rates
+
     def close(self):
         self.sock.close()
 
     def save(self, path):
-        """Save the current data to a file."""
+        """Save the retained data (spilled segments and memory) to a file."""
+        header_end = len(self.header)
         with open(path, 'wb') as f:
-            f.write(self.data)
+            f.write(self.header)
+            for segment, start, end in self.spill_segments:
+                with open(segment, 'rb') as s:
+                    s.seek(max(0, header_end - start))
+                    shutil.copyfileobj(s, f)
+            f.write(self.data[max(0, header_end - self.base):])
 
     def clear(self):
-        """Clear the in-memory data."""
-        self.data.clear()
-        self.pos = 0
+        """Clear the in-memory and spilled data."""
+        self.start = self.end = 0
+        self.base = self.pos = self.released = len(self.header)
+        self.boundaries.clear()
+        self.total_bytes = 0
+        for segment, _, _ in self.spill_segments:
+            Path(segment).unlink(missing_ok=True)
+        self.spill_segments = []
 
     def pause(self):
         """Pause receiving data."""
@@ -304,46 +708,239 @@ class UDPStreamReceiver:
         elif whence == 1:  # relative
             new_pos = self.pos + offset
         elif whence == 2:  # from end
-            new_pos = len(self.data) + offset
+            new_pos = self.base + self.end - self.start + offset
         else:
             raise ValueError("Invalid value for whence. Must be 0, 1, or 2.")
 
         if new_pos < 0:
             raise ValueError("Cannot seek to negative position.")
+        if new_pos < self.base:
+            raise ValueError(f"Cannot seek to {new_pos}: data before {self.base} is no longer retained.")
 
         # If seeking forward beyond current data, read more until position is reachable
-        while new_pos > len(self.data):
-            packet, _ = self.sock.recvfrom(self.max_packet_size)
-            self.data.extend(packet)
+        while new_pos > self.base + self.end - self.start:
+            self._receive()
 
         self.pos = new_pos
 
+    def _receive(self):
+        # Block for one datagram, then drain every pending one without waiting
+        self._reserve(self.max_packet_size)
+        self._commit(self.sock.recv_into(self.view[self.end:], self.max_packet_size))
+        if not hasattr(socket, 'MSG_DONTWAIT'):
+            return
+        try:
+            while True:
+                self._reserve(self.max_packet_size)
+                self._commit(self.sock.recv_into(self.view[self.end:], self.max_packet_size, socket.MSG_DONTWAIT))
+        except (BlockingIOError, InterruptedError):
+            pass
+
+    def _commit(self, size: int):
+        self.packets_received += 1
+        self.bytes_received += size
+        if self.is_paused:
+            return
+
+        self.end += size
+        self.total_bytes += size
+        if len(self.header) < S_PCAP_HEAD.size and self.base == 0:
+            self.header = bytes(self.view[self.start:min(self.end, self.start + S_PCAP_HEAD.size)])
+
+        if self.max_buffer_bytes and self.end - self.start > self.max_buffer_bytes:
+            # Drop up to the first released boundary that brings the buffer under the cap, so the retained
+            # data (and save()) always starts at a record
+            target = self.base + self.end - self.start - self.max_buffer_bytes
+            limit = min(self.released, self.pos)
+            drop_to = self.base
+            while self.boundaries and drop_to < target and self.boundaries[0] <= limit:
+                drop_to = max(drop_to, self.boundaries.popleft())
+            self._drop(drop_to - self.base)
+
+    def _reserve(self, size: int):
+        # Make room for `size` bytes after the retained data, compacting or growing the buffer
+        if len(self.buffer) - self.end >= size:
+            return
+
+        retained = self.end - self.start
+        if retained + size <= len(self.buffer) // 2:
+            self.buffer[:retained] = self.view[self.start:self.end]
+        else:
+            buffer = bytearray(max(2 * len(self.buffer), 2 * (retained + size)))
+            buffer[:retained] = self.view[self.start:self.end]
+            self.buffer, self.view = buffer, memoryview(buffer)
+        self.start, self.end = 0, retained
+
+    def _drop(self, size: int):
+        if size <= 0:
+            return
+        if self.spill_dir:
+            self._spill(self.view[self.start:self.start + size])
+        self.start += size
+        self.base += size
+
+    def _spill(self, chunk: memoryview):
+        if not self.spill_segments or self.spill_segments[-1][2] - self.spill_segments[-1][1] >= self.spill_segment_bytes:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            self.spill_count += 1
+            self.spill_segments.append([self.spill_dir / f"segment_{self.spill_count:05d}.bin", self.base, self.base])
+            if len(self.spill_segments) > self.spill_max_segments:
+                Path(self.spill_segments.pop(0)[0]).unlink(missing_ok=True)
+
+        segment = self.spill_segments[-1]
+        with open(segment[0], 'ab') as f:
+            f.write(chunk)
+        segment[2] += len(chunk)
+
+class PcapFileReceiver:
+    """
+    Memory-mapped PCAP file exposing the same read/seek/tell contract as UDPStreamReceiver.
+    A sidecar index of packet offsets and timestamps (<file>.idx.npy) is built on first use and memory-mapped afterwards.
+    """
+
+    def __init__(self, path, build_index=True):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + '.idx.npy')
+        self.file = open(self.path, 'rb')
+        size = self.path.stat().st_size
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if size > 0 else b''
+        self.pos = 0
+        self.total_bytes = len(self.data)
+        self.is_paused = False
+        self.index = self._load_index() if build_index else None
+
+    def read(self, size: int) -> bytes:
+        result = self.data[self.pos:self.pos + size]
+        self.pos += len(result)
+        return result
+
+    def tell(self) -> int:
+        return self.pos
+
+    def seek(self, offset: int, whence: int = 0):
+        """Seek to a position in the mapped file."""
+        if whence == 0:  # absolute
+            new_pos = offset
+        elif whence == 1:  # relative
+            new_pos = self.pos + offset
+        elif whence == 2:  # from end
+            new_pos = len(self.data) + offset
+        else:
+            raise ValueError("Invalid value for whence. Must be 0, 1, or 2.")
+
+        if new_pos < 0:
+            raise ValueError("Cannot seek to negative position.")
+
+        self.pos = min(new_pos, len(self.data))
+
+    def release(self, pos: int):
+        """Files are mapped, not buffered, so there is nothing to release."""
+        pass
+
+    def retained_bytes(self) -> int:
+        return len(self.data)
+
+    def available(self) -> int:
+        return len(self.data) - self.pos
+
+    def rates(self) -> tuple[float, float]:
+        return 0.0, 0.0
+
+    def seek_time(self, ts: float) -> int:
+        """Seek to the first packet with timestamp >= ts using the packet index. Returns the packet number."""
+        index = self.packet_index()
+        i = int(np.searchsorted(index['ts'], ts))
+        self.pos = int(index['offset'][i]) if i < len(index) else len(self.data)
+        return i
+
+    def packet_index(self) -> npt.NDArray:
+        """Return the (offset, ts) record of every packet in the file."""
+        if self.index is None:
+            self.index = self._load_index()
+        return self.index
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self.data)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.file.close()
+
+    def save(self, path):
+        """Save a copy of the file."""
+        shutil.copyfile(self.path, path)
+
+    def clear(self):
+        """Files are read-only, there is no in-memory data to clear."""
+        pass
+
+    def pause(self):
+        self.is_paused = True
+
+    def resume(self):
+        self.is_paused = False
+
+    def _load_index(self) -> npt.NDArray:
+        # Reuse the sidecar index when it is newer than the capture
+        try:
+            if self.index_path.stat().st_mtime >= self.path.stat().st_mtime:
+                index = np.load(self.index_path, mmap_mode='r')
+                if index.dtype == PCAP_INDEX_DTYPE and (len(index) == 0 or index['offset'][-1] < len(self.data)):
+                    return index
+        except (OSError, ValueError):
+            pass
+
+        buffer = self.getbuffer()
+        offsets = find_packet_offsets(buffer)
+        headers = np.ascontiguousarray(gather_rows(np.frombuffer(buffer, dtype=np.uint8), offsets, 8)).view(np.uint32)
+        index = np.empty(len(offsets), dtype=PCAP_INDEX_DTYPE)
+        index['offset'] = offsets
+        index['ts'] = headers[:, 0] + headers[:, 1] * 1e-6
+
+        try:
+            np.save(self.index_path, index)
+        except OSError as e:
+            print(f"Could not write PCAP index {self.index_path}: {e}")
+        return index
+
 class NexmonCSIStreamReader:
-    def __init__(self, host='0.0.0.0', port=5500, file=None, simulate_time=False, shift_fft=True, verbose=True, ts_as_datetime=True):
+    def __init__(self, host='0.0.0.0', port=5500, file=None, simulate_time=False, shift_fft=True, verbose=True, ts_as_datetime=False, batch_decode=False,
+                 max_buffer_bytes=None, spill_dir=None):
         self.host = host
         self.port = port
         self.receiver = None
+        self.max_buffer_bytes = max_buffer_bytes    # Bound on the UDP receive buffer, None keeps everything
+        self.spill_dir = spill_dir                  # Directory for data dropped from the bounded buffer
         self.file = file
         self.simulate_time = simulate_time
         self.shift_fft = shift_fft
         self.verbose = verbose
-        self.ts_as_datetime = ts_as_datetime
+        self.ts_as_datetime = ts_as_datetime    # Yield datetime instead of float epoch seconds (slower)
+        self.resync_count = 0           # Number of resyncs after a corrupted record
+        self.skipped_bytes = 0          # Bytes skipped while resyncing
+        self.batch_decode = batch_decode    # Decode whole PCAP files at once instead of packet by packet
     
     def get_name(self) -> str:
         return f"Nexmon CSI Reader {self.host}:{self.port}" if self.file is None else f"Nexmon PCAP File ({self.file})"
 
+    def has_pending(self) -> bool:
+        """True if more packets are already buffered and can be read without blocking."""
+        return self.receiver is not None and self.receiver.available() > 0
+
     def __iter__(self):
         if self.file:
-            data = Path(self.file).read_bytes()
-            self.receiver = io.BytesIO(data)
+            self.receiver = PcapFileReceiver(self.file)
             if self.verbose:
                 print(f"Reading from PCAP file: {self.file}")
         else:
-            self.receiver = UDPStreamReceiver(host=self.host, port=self.port)
+            self.receiver = UDPStreamReceiver(host=self.host, port=self.port, max_buffer_bytes=self.max_buffer_bytes, spill_dir=self.spill_dir)
             if self.verbose:
                 print(f"Listening on {self.host}:{self.port}...")
 
         read_pcap_global_header(self.receiver)
+        if self.file and self.batch_decode:
+            return self._batch_generator()
         return self._generator()
     
     def _generator(self):
@@ -351,12 +948,20 @@ class NexmonCSIStreamReader:
         
         while True:
             try:
-                ts, _ = read_pcap_packet_header(self.receiver)
+                start = self.receiver.tell()
+                self.receiver.release(start)
+                ts, incl_len = read_pcap_packet_header(self.receiver)
+                if not 0 < incl_len <= 65535:
+                    raise ValueError(f"Invalid packet length {incl_len}")
                 #read_ethernet_header(self.receiver)
                 #read_ip_header(self.receiver)
                 read_exact(self.receiver, 14 + 20)  # Skip Ethernet + IP headers
                 _, _, udp_len, _ = read_udp_header(self.receiver)
+                if udp_len != incl_len - S_ETH.size - S_IP_MIN.size:
+                    raise ValueError(f"UDP length {udp_len} does not match packet length {incl_len}")
                 csi, mac = read_nexmon_csi(self.receiver, udp_len - 8)
+                if csi is None:
+                    continue                    # Unsupported chip
 
                 # Simulate real-time pacing
                 if ts_prev is not None and self.simulate_time:
@@ -382,6 +987,40 @@ class NexmonCSIStreamReader:
             except Exception as e:
                 if self.verbose:
                     print(f" [x] Error reading stream: {e}. Resyncing to next packet...")
-                skipped = resync_to_next_packet(self.receiver)
+                self.receiver.seek(start + 1)   # Scan past the header that failed
+                skipped = resync_to_next_packet(self.receiver) + 1
+                self.resync_count += 1
+                self.skipped_bytes += skipped
                 if self.verbose:
-                    print(" [✔] Resynced to next packet OK. Bytes skipped:", skipped)
\ No newline at end of file
+                    print(" [✔] Resynced to next packet OK. Bytes skipped:", skipped)
+
+    def _batch_generator(self):
+        batches = decode_pcap_batches(self.receiver.getbuffer(), self.receiver.packet_index()['offset'], shift_fft=self.shift_fft)
+        if not batches:
+            return
+
+        # Replay frames in capture order across chip/bandwidth batches
+        index = np.concatenate([batch['index'] for batch in batches])
+        group = np.concatenate([np.full(len(batch['index']), i) for i, batch in enumerate(batches)])
+        row = np.concatenate([np.arange(len(batch['index'])) for batch in batches])
+        order = np.argsort(index, kind='stable')
+        ts_prev = None
+
+        for g, r in zip(group[order].tolist(), row[order].tolist()):
+            batch = batches[g]
+            ts = float(batch['ts'][r])
+
+            # Simulate real-time pacing
+            if ts_prev is not None and self.simulate_time:
+                dt = ts - ts_prev
+                dt = np.clip(dt, 0, 0.005)
+                time.sleep(dt)
+            ts_prev = ts
+
+            if self.ts_as_datetime:
+                ts = datetime.fromtimestamp(ts)
+
+            yield ts, batch['csi'][r], batch['mac'][r]
+
+        if self.verbose:
+            print("End of PCAP reached.")
@@ -8,9 +8,10 @@ from datetime import datetime, timedelta
 import socket
 import time
 from pathlib import Path
+from readers.nexmon._nexmon_fallback import resync_to_next_packet, get_decoder, Int16Decoder
+from readers.nexmon._nexmon_fallback import NexmonCSIStreamReader as FallbackStreamReader
 
 cimport numpy as cnp
-from cpython.bytes cimport PyBytes_AS_STRING
 
 ctypedef cnp.int16_t  i16
 ctypedef cnp.float32_t f32
@@ -35,17 +36,21 @@ S_CHAR_SIGNED = struct.Struct('b')               # (2) signed char
 S_CHAR        = struct.Struct('B')               # (2) unsigned char
 
 MAC_CACHE : Dict[bytes, str] = {}               # MACs cache for faster formatting
+MAC_CACHE_SIZE = 4096                           # Oldest entries are dropped beyond this, MACs passing by must not grow it forever
 
-def format_mac(mac_bytes: bytes) -> str:
+def format_mac(mac_bytes) -> str:
+    mac_bytes = bytes(mac_bytes)    # memoryview slices are not hashable
     if mac_bytes in MAC_CACHE:
         return MAC_CACHE[mac_bytes]
     
     h = mac_bytes.hex()
     mac_str = ':'.join(h[i:i+2] for i in range(0, 12, 2))
+    if len(MAC_CACHE) >= MAC_CACHE_SIZE:
+        del MAC_CACHE[next(iter(MAC_CACHE))]
     MAC_CACHE[mac_bytes] = mac_str
     return mac_str
 
-def read_exact(input, length) -> bytes:
+def read_exact(input, length):
     bytes = input.read(length)
     if len(bytes) != length:
         raise EOFError(f'Reached end of file before reading the expected number of bytes: {bytes.hex()}')
@@ -117,11 +122,11 @@ def read_udp_header(input, verbose=False):
         print("  Checksum:        ", checksum)
     return src_port, dst_port, length, checksum
 
-def parse_csi_to_c64(bytes data, int num_subcarriers):
+def parse_csi_to_c64(const unsigned char[::1] data, int num_subcarriers):
     cdef Py_ssize_t i
 
-    # Get a raw pointer to the bytes buffer and point at int16 IQ starting at offset 18
-    cdef const unsigned char* base = <const unsigned char*> PyBytes_AS_STRING(data)
+    # Get a raw pointer to the packet buffer (bytes or memoryview) and point at int16 IQ starting at offset 18
+    cdef const unsigned char* base = &data[0]
     cdef const i16* p = <const i16*>(base + 18)
 
     cdef cnp.ndarray[c64, ndim=1] out = np.empty(num_subcarriers, dtype=np.complex64)
@@ -142,20 +147,19 @@ def read_nexmon_csi(input, length, verbose=False):
     sequence_no = data[10] | (data[11] << 8)                    # unsigned int little endian
     coreSpatialVal = data[12] | (data[13] << 8)                 # unsigned int little endian
     channel_spec = data[14:16]                                  # int
-    chip = CHIPS_INT[data[16] | (data[17] << 8)]                # unsigned int little endian
+    chip_id = data[16] | (data[17] << 8)                         # unsigned int little endian
     num_subcarriers = (len(data) - 18) // 4
-    
-    if chip in ["4339", "43455c0"]:
+
+    # Unsupported chips are skipped, the whole payload has already been consumed
+    decoder = get_decoder(chip_id)
+    csi = None
+    if type(decoder) is Int16Decoder:
         csi = parse_csi_to_c64(data, num_subcarriers)
         return csi, mac
-        # return csi_float32.view(np.complex64), mac
-    elif chip == "4366c0":
-        csi = np.frombuffer(data[18:], dtype=np.uint32)  # Convert bytes → float16 array
-        csi = unpack_float_acphy(10, 1, 12, 6, num_subcarriers, csi)
-        csi = csi.astype(np.float32).view(np.complex64)     # Truco para convertir a complejos sin loops
-    else:
-        raise Exception(f'Unsupported chip: "{chip}"')
-    
+    elif decoder is not None:
+        samples = np.frombuffer(data, dtype=np.uint8, count=num_subcarriers * 4, offset=18).reshape(1, -1)
+        csi = decoder.decode(samples)[0]
+
     if verbose:
         print(f'\nNexmon CSI Packet ({len(data)} bytes)', data.hex())
         print('  Signature:          ', nexmon_signature)
@@ -165,9 +169,9 @@ def read_nexmon_csi(input, length, verbose=False):
         print('  Sequence No:        ', sequence_no)
         print('  Core Spatial Stream:', coreSpatialVal)
         print('  Channel Spec:       ', channel_spec)
-        print('  Chip:               ', chip)
+        print('  Chip:               ', CHIPS_INT.get(chip_id, hex(chip_id)))
         print('  Number of Subcarriers:', num_subcarriers)
-        print('  CSI Data:            ', len(data[18:]), 'bytes', len(csi), 'complex values')
+        print('  CSI Data:            ', len(data[18:]), 'bytes', 0 if csi is None else len(csi), 'complex values')
 
     return csi, mac
 
@@ -232,156 +236,31 @@ def unpack_float_acphy(
 
     return vals * sign
 
-def resync_to_next_packet(input):
+
+class NexmonCSIStreamReader(FallbackStreamReader):
     """
-    Resync to the next valid PCAP packet header by scanning byte-by-byte.
-    Uses sanity checks on ts_sec, ts_usec, incl_len, and orig_len.
+    Same reader as the pure-Python one, with the per-packet loop using the compiled CSI parser.
     """
-    packet_header_size = 16
-    max_seek_bytes = 10 * 1024 * 1024  # Avoid infinite loops on corrupted files
-    bytes_scanned = 0
-
-    while True:
-        pos = input.tell()
-        data = input.read(packet_header_size)
-        if len(data) < packet_header_size:
-            raise EOFError("Reached end of file during resync")
-
-        try:
-            ts_sec, ts_usec, incl_len, orig_len = struct.unpack('<IIII', data)
-
-            now = int(time.time())
-            # Sanity checks:
-            if (
-                2000 <= ts_sec <= now + 3600 and   # reasonable UNIX timestamp (2000+)
-                0 <= ts_usec < 1_000_000 and       # microseconds range
-                0 < incl_len <= 65535 and
-                0 < orig_len <= 65535 and
-                incl_len <= orig_len
-            ):
-                # Looks like a valid packet header
-                input.seek(pos)
-                return bytes_scanned
-        except struct.error:
-            pass
-
-        # Move forward by 1 byte
-        input.seek(pos + 1)
-        bytes_scanned += 1
-
-        if bytes_scanned > max_seek_bytes:
-            raise RuntimeError("Resync failed after scanning too many bytes")
-
-class UDPStreamReceiver:
-    """Receives UDP packets, stores all data in memory, and supports random access with seek/tell."""
-
-    def __init__(self, host='0.0.0.0', port=5500, max_packet_size=65535, receive_buffer_size_mb=32):
-        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer_size_mb * 1024 * 1024)
-        self.sock.bind((host, port))
-
-        self.max_packet_size = max_packet_size
-        self.data = bytearray()  # store all received data
-        self.pos = 0             # current read position
-        self.is_paused = False
-
-    def read(self, size: int) -> bytes:
-        # Fill buffer until enough bytes are available from current pos
-        while len(self.data) < self.pos + size:
-            packet, _ = self.sock.recvfrom(self.max_packet_size)
-            if not self.is_paused:
-                self.data.extend(packet)
-
-        # Read from current position
-        result = self.data[self.pos:self.pos + size]
-        self.pos += size
-        return bytes(result)
-
-    def tell(self) -> int:
-        return self.pos
-    
-    def close(self):
-        self.sock.close()
-
-    def save(self, path):
-        """Save the current data to a file."""
-        with open(path, 'wb') as f:
-            f.write(self.data)
-
-    def clear(self):
-        """Clear the in-memory data."""
-        self.data.clear()
-        self.pos = 0
-
-    def pause(self):
-        """Pause receiving data."""
-        self.is_paused = True
-        
-    def resume(self):
-        """Resume receiving data."""
-        self.is_paused = False
-
-    def seek(self, offset: int, whence: int = 0):
-        """Seek to a position in the memory stream."""
-        if whence == 0:  # absolute
-            new_pos = offset
-        elif whence == 1:  # relative
-            new_pos = self.pos + offset
-        elif whence == 2:  # from end
-            new_pos = len(self.data) + offset
-        else:
-            raise ValueError("Invalid value for whence. Must be 0, 1, or 2.")
-
-        if new_pos < 0:
-            raise ValueError("Cannot seek to negative position.")
-
-        # If seeking forward beyond current data, read more until position is reachable
-        while new_pos > len(self.data):
-            packet, _ = self.sock.recvfrom(self.max_packet_size)
-            self.data.extend(packet)
-
-        self.pos = new_pos
-
-class NexmonCSIStreamReader:
-    def __init__(self, host='0.0.0.0', port=5500, file=None, simulate_time=False, shift_fft=True, verbose=True, ts_as_datetime=True):
-        self.host = host
-        self.port = port
-        self.receiver = None
-        self.file = file
-        self.simulate_time = simulate_time
-        self.shift_fft = shift_fft
-        self.verbose = verbose
-        self.ts_as_datetime = ts_as_datetime
-    
-    def get_name(self) -> str:
-        return f"Nexmon CSI Reader {self.host}:{self.port}" if self.file is None else f"Nexmon PCAP File ({self.file})"
-
-    def __iter__(self):
-        if self.file:
-            data = Path(self.file).read_bytes()
-            self.receiver = io.BytesIO(data)
-            if self.verbose:
-                print(f"Reading from PCAP file: {self.file}")
-        else:
-            self.receiver = UDPStreamReceiver(host=self.host, port=self.port)
-            if self.verbose:
-                print(f"Listening on {self.host}:{self.port}...")
 
-        read_pcap_global_header(self.receiver)
-        return self._generator()
-    
     def _generator(self):
         ts_prev = None
         
         while True:
             try:
-                ts, _ = read_pcap_packet_header(self.receiver)
+                start = self.receiver.tell()
+                self.receiver.release(start)
+                ts, incl_len = read_pcap_packet_header(self.receiver)
+                if not 0 < incl_len <= 65535:
+                    raise ValueError(f"Invalid packet length {incl_len}")
                 #read_ethernet_header(self.receiver)
                 #read_ip_header(self.receiver)
                 read_exact(self.receiver, S_ETH.size + S_IP_MIN.size)  # Skip Ethernet + IP headers
                 _, _, udp_len, _ = read_udp_header(self.receiver)
+                if udp_len != incl_len - S_ETH.size - S_IP_MIN.size:
+                    raise ValueError(f"UDP length {udp_len} does not match packet length {incl_len}")
                 csi, mac = read_nexmon_csi(self.receiver, udp_len - 8)
+                if csi is None:
+                    continue                    # Unsupported chip
 
                 # Simulate real-time pacing
                 if ts_prev is not None and self.simulate_time:
@@ -406,6 +285,9 @@ class NexmonCSIStreamReader:
             except Exception as e:
                 if self.verbose:
                     print(f" [x] Error reading stream: {e}. Resyncing to next packet...")
-                skipped = resync_to_next_packet(self.receiver)
+                self.receiver.seek(start + 1)   # Scan past the header that failed
+                skipped = resync_to_next_packet(self.receiver) + 1
+                self.resync_count += 1
+                self.skipped_bytes += skipped
                 if self.verbose:
-                    print(" [✔] Resynced to next packet OK. Bytes skipped:", skipped)
\ No newline at end of file
+                    print(" [✔] Resynced to next packet OK. Bytes skipped:", skipped)
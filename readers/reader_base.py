@@ -3,5 +3,7 @@ from typing import Iterable
 class Reader(Iterable):
     def get_name(self) -> str:
         raise NotImplementedError("Reader must implement get_name()")
+    def has_pending(self) -> bool:
+        return False    # No frames known to be buffered, batches are flushed after every frame
     def __iter__(self):
         raise NotImplementedError("Reader must implement __iter__()")
\ No newline at end of file
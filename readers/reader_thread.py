@@ -1,16 +1,26 @@
 import time
 import threading
+from datetime import datetime
 import numpy as np
 from services.api import Api
 from readers.reader_base import Reader
 from utils.preprocess import to_db
 
+def format_ts(ts) -> str:
+    if not isinstance(ts, datetime):
+        ts = datetime.fromtimestamp(ts)
+    return ts.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
 class ReaderThread(threading.Thread):
-    def __init__(self, api: Api, reader: Reader, window=2048):
+    def __init__(self, api: Api, reader: Reader, window=2048, batch_size=64, batch_latency=0.010):
         super(ReaderThread, self).__init__()
         self.window = window
         self.reader = reader
         self.api = api
+        self.batch_size = batch_size          # Flush after this many frames...
+        self.batch_latency = batch_latency    # ...or once the oldest pending frame is this old (seconds)
+        self.batch = []
+        self.batch_start = 0.0
 
     def run(self):
         print(f"Starting {self.reader.get_name()}...")
@@ -18,7 +28,29 @@ class ReaderThread(threading.Thread):
         for count, (ts, csi, mac) in enumerate(self.reader):
             if start_time is None:
                 start_time = time.time()
-            self.api.csi().push(mac, csi, ts)
+
+            if not self.batch:
+                self.batch_start = time.perf_counter()
+            self.batch.append((ts, csi, mac))
+
+            # Flush when the batch is full, too old, or the reader would block waiting for the next frame
+            if (len(self.batch) >= self.batch_size or time.perf_counter() - self.batch_start >= self.batch_latency
+                    or not self.reader.has_pending()):
+                self.flush()
+
             if count % 500 == 0:
                 elapsed = time.time() - start_time
-                print(f"[{ts.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}] Received {count} frames in {elapsed:.2f} seconds")
\ No newline at end of file
+                print(f"[{format_ts(ts)}] Received {count} frames in {elapsed:.2f} seconds")
+        self.flush()
+
+    def flush(self):
+        """
+        Push the pending frames with CSI.push_many, one call per run of frames with the same size.
+        """
+        batch, self.batch = self.batch, []
+        first = 0
+        for i in range(1, len(batch) + 1):
+            if i == len(batch) or batch[i][1].shape != batch[first][1].shape:
+                ts, csi, macs = zip(*batch[first:i])
+                self.api.csi().push_many(macs, np.stack(csi), ts)
+                first = i
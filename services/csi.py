@@ -1,91 +1,617 @@
 import threading
+import time
+import tempfile
 import numpy as np
-from typing import Dict, List, TypedDict, TypeAlias
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Set, TypedDict, TypeAlias
 import numpy.typing as npt
-from utils.preprocess import to_db
+from utils.preprocess import to_db, sanitize_phase
 from services.filters import Filters
+from services.filter_pipeline import FilterPipeline, FilterJob, add_tick
+from services.csi_buffer import CSIBuffer, DerivedSeries, UnwrappedPhase, MaskedColumns
+from services.csi_history import CSIHistory, HistoryRange
+from services.csi_pyramid import DecimationPyramid
+from services.csi_stats import RunningStats, SubcarrierStats
 
 Mac: TypeAlias = str
 
-class CSIEntry(TypedDict):
-    raw: npt.NDArray[np.complex64]     # e.g., shape (N, S)
-    amp: npt.NDArray[np.float32]       # e.g., shape (N, S)
-    phase: npt.NDArray[np.float32]     # e.g., shape (N, S)
-    ts: List[float]                    # timestamps aligned with rows in arrays
+class MacStats(TypedDict):
+    frames: int          # frames received, stored or not
+    last_seen: float     # time.monotonic() of the last frame
+
+class MaskedSeries:
+    """
+    Derived series of a CSIEntry for one subcarrier mask. `amp` is the masked part of the entry's full-band
+    filtered amp, cached for the amp pyramid and statistics; `original_amp`, `original_phase` and the unwrapped
+    phases are derived from the full-band raw CSI.
+    """
+
+    def __init__(self, entry: 'CSIEntry', columns):
+        buffer = entry.buffer
+        self.columns = columns          # slice for contiguous masks (views), else integer index
+        width = len(range(*columns.indices(entry.nfft))) if isinstance(columns, slice) else len(columns)
+        frequencies = entry.frequencies[columns]
+        self.amp = MaskedColumns(entry.amp, columns, (width,))
+        self.original_amp = DerivedSeries(buffer, 'raw', lambda raw: to_db(raw[:, columns]), np.float32, (width,))
+        self.original_phase = DerivedSeries(buffer, 'raw', lambda raw: np.angle(raw[:, columns]), np.float32, (width,))
+        self.unwrapped_phase = UnwrappedPhase(buffer, 'raw', lambda raw: np.angle(raw[:, columns]), (width,))
+        self.sanitized_phase = UnwrappedPhase(buffer, 'raw', lambda raw: sanitize_phase(np.angle(raw[:, columns]), frequencies), (width,))
+        self.amp_pyramid = DecimationPyramid(self.amp)    # Time-decimated amp for zoomed-out views
+        self.amp_stats = RunningStats(self.amp)           # Per-subcarrier amp statistics over the window
+
+    def resize(self):
+        self.amp.resize()
+        self.original_amp.resize()
+        self.original_phase.resize()
+        self.unwrapped_phase.resize()
+        self.sanitized_phase.resize()
+        self.amp_pyramid.resize()
+
+    def nbytes(self) -> int:
+        return (self.amp.nbytes() + self.original_amp.nbytes() + self.original_phase.nbytes()
+                + self.unwrapped_phase.nbytes() + self.sanitized_phase.nbytes() + self.amp_pyramid.nbytes())
+
+class CSIEntry:
+    """
+    Per-MAC data: full-band raw CSI and timestamps are stored on push. `amp` (dB) and `phase` are the full-band
+    filtered columns: rows pushed while filters are enabled hold the filter chain output, the others are derived
+    from raw. Readers apply the subcarrier mask to them, and the other series are derived on demand for the mask
+    being read, with one set of caches per recently used mask.
+    """
+
+    max_masks = 4                       # Masks with derived caches kept per MAC
+
+    def __init__(self, nfft, window, window_seconds=0.0, shifted=True):
+        self.frequencies = np.fft.fftfreq(nfft, 1 / nfft)     # subcarrier index of each stored column
+        if shifted:
+            self.frequencies = np.fft.fftshift(self.frequencies)
+        self.buffer = CSIBuffer({
+            'raw': ((nfft,), np.complex64),               # shape (N, nfft), fftshifted if enabled
+            'ts': ((), np.float64),                       # timestamps aligned with rows in arrays
+        }, window, time_column='ts', window_seconds=window_seconds)
+        self.amp = DerivedSeries(self.buffer, 'raw', to_db, np.float32)
+        self.phase = DerivedSeries(self.buffer, 'raw', np.angle, np.float32)
+        self.masks : Dict[bytes, MaskedSeries] = {}
+        self.masks_lock = threading.Lock()      # masked() is called from the reader and the UI thread
+        self.published = self.buffer.state      # Buffer state visible to readers, set once a block is fully filtered
+        self.pending = 0                        # Blocks queued in the filter pipeline
+        self.last_snapshot = None
+        self.history : CSIHistory = None        # Cold tier for frames dropped from the window, if enabled
+
+    @property
+    def nfft(self) -> int:
+        return self.buffer.columns['raw'][0][0]
+
+    def masked(self, key: bytes, columns) -> MaskedSeries:
+        """Derived series for a mask, created on first use; the least recently used mask is dropped beyond `max_masks`."""
+        with self.masks_lock:
+            series = self.masks.pop(key, None)
+            if series is None:
+                series = MaskedSeries(self, columns)
+                if len(self.masks) >= self.max_masks:
+                    del self.masks[next(iter(self.masks))]
+            self.masks[key] = series
+            return series
+
+    def unfiltered(self, raw: np.ndarray):
+        """Amp and phase of new raw rows (N, nfft), the input of the filter chain."""
+        return self.amp.fn(raw), self.phase.fn(raw)
+
+    def put_filtered(self, first: int, amp: np.ndarray, phase: np.ndarray):
+        """Store the filter chain output for the rows starting at absolute index `first`."""
+        self.amp.put(first, amp)
+        self.phase.put(first, phase)
+
+    def resize(self, window, window_seconds=0.0):
+        self.buffer.resize(window, window_seconds=window_seconds)
+        self.amp.resize()
+        self.phase.resize()
+        for series in list(self.masks.values()):
+            series.resize()
+
+    def nbytes(self) -> int:
+        """Resident bytes of the raw buffer and the derived caches."""
+        return (self.buffer.nbytes() + self.amp.nbytes() + self.phase.nbytes()
+                + sum(series.nbytes() for series in list(self.masks.values())))
+
+    def snapshot(self, key: bytes, columns) -> 'CSISnapshot':
+        state = self.published
+        snapshot = self.last_snapshot
+        if snapshot is None or snapshot.state is not state or snapshot.key != key:
+            snapshot = self.last_snapshot = CSISnapshot(self, state, key, columns)
+        return snapshot
+
+def read_only(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+class CSISnapshot:
+    """
+    Consistent, read-only view of one MAC's window under a subcarrier mask: raw, amp, phase and ts always have
+    the same length, and `seq` (rows pushed so far for the MAC) identifies the version. Amp and phase are the
+    filtered columns, original_amp and original_phase the unfiltered ones; all are made on first access.
+    Taking a snapshot never blocks the reader thread and never copies stored rows.
+    """
+
+    def __init__(self, entry: CSIEntry, state, key: bytes, columns):
+        arrays, start, end, offset = state
+        self.entry = entry
+        self.state = state
+        self.key = key
+        self.columns = columns
+        self.seq = offset + end
+        self.full_raw = read_only(arrays['raw'][start:end])      # all subcarriers, shape (N, nfft)
+        self.ts = read_only(arrays['ts'][start:end])
+        self._raw = None
+        self._amp = None
+        self._phase = None
+        self._original_amp = None
+        self._original_phase = None
+        self._unwrapped_phase = None
+        self._sanitized_phase = None
+        self._stats = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def index(self, t: float, side: str = 'left') -> int:
+        """Row of the first frame at or after `t` (after, with side='right') in the timestamp index."""
+        return int(np.searchsorted(self.ts, t, side=side))
+
+    def range(self, t_from: float, t_to: float) -> 'CSISnapshot':
+        """
+        Sub-snapshot of the frames with t_from <= ts <= t_to, made of views of this one.
+        """
+        arrays, start, end, offset = self.state
+        return CSISnapshot(self.entry, (arrays, start + self.index(t_from), start + self.index(t_to, 'right'), offset), self.key, self.columns)
+
+    @property
+    def series(self) -> MaskedSeries:
+        return self.entry.masked(self.key, self.columns)
+
+    @property
+    def raw(self) -> np.ndarray:
+        """Raw CSI of the masked subcarriers, a view for contiguous masks."""
+        if self._raw is None:
+            self._raw = read_only(self.full_raw[:, self.columns])
+        return self._raw
+
+    @property
+    def amp(self) -> np.ndarray:
+        """Filtered amp of the masked subcarriers, a view for contiguous masks."""
+        if self._amp is None:
+            self._amp = read_only(self.entry.amp.get(self.state)[:, self.columns])
+        return self._amp
+
+    @property
+    def phase(self) -> np.ndarray:
+        """Filtered phase of the masked subcarriers, a view for contiguous masks."""
+        if self._phase is None:
+            self._phase = read_only(self.entry.phase.get(self.state)[:, self.columns])
+        return self._phase
+
+    @property
+    def original_amp(self) -> np.ndarray:
+        """Amp derived from raw CSI, before filtering."""
+        if self._original_amp is None:
+            self._original_amp = read_only(self.series.original_amp.get(self.state))
+        return self._original_amp
+
+    @property
+    def original_phase(self) -> np.ndarray:
+        """Phase derived from raw CSI, before filtering."""
+        if self._original_phase is None:
+            self._original_phase = read_only(self.series.original_phase.get(self.state))
+        return self._original_phase
+
+    @property
+    def unwrapped_phase(self) -> np.ndarray:
+        """Phase unwrapped in time, see UnwrappedPhase."""
+        if self._unwrapped_phase is None:
+            self._unwrapped_phase = read_only(self.series.unwrapped_phase.get(self.state))
+        return self._unwrapped_phase
+
+    @property
+    def sanitized_phase(self) -> np.ndarray:
+        """Phase with the linear STO/CFO term of each frame removed, unwrapped in time."""
+        if self._sanitized_phase is None:
+            self._sanitized_phase = read_only(self.series.sanitized_phase.get(self.state))
+        return self._sanitized_phase
+
+    @property
+    def stats(self) -> SubcarrierStats:
+        """Per-subcarrier amp mean, variance, energy, min and max over the snapshot, maintained incrementally."""
+        if self._stats is None:
+            self._stats = self.series.amp_stats.get(self.state)
+        return self._stats
+
+    def decimated(self, width: int) -> Dict[str, np.ndarray]:
+        """
+        Amp decimated in time to at most about `width` rows (e.g. the viewport width in pixels), from the
+        entry's pyramid: min, max and mean (N, S) over blocks of 2^k frames and the ts (N,) of their first frame.
+        """
+        pyramid = self.series.amp_pyramid
+        level = pyramid.level_for(len(self), width)
+        if level == 0:
+            return { 'min': self.amp, 'max': self.amp, 'mean': self.amp, 'ts': self.ts }
+        return { name: read_only(view) for name, view in pyramid.get(self.state, level).items() }
 
 class CSI:
     def __init__(self, subcarrier_mask=None, window=2048):
         self.csi_data : Dict[Mac, CSIEntry] = {}
         self.mutex = threading.Lock()
         self.selected_mac = None
+        self.shift_fft = False                                  # Frames arrive in FFT order and are shifted while gathering
+        self.gather_index : Dict[int, npt.NDArray[np.intp]] = {}  # FFT size → fftshift gather index
+        self.subcarrier_mask = None
         self.set_mask(subcarrier_mask)
         self.reader = None
-        self.window = window
+        self.window = window                        # Frames kept per MAC
+        self.window_seconds = 0.0                   # If > 0, seconds kept per MAC instead, up to `max_window` frames
+        self.max_window = 65536
         self.filters : Filters = Filters()
+        self.pipeline = FilterPipeline(self)        # Runs the filters off the reader thread, started on first use
+        self.push_ticks : np.ndarray = np.zeros(100)  # Seconds spent in push_many, last 100 calls
+
+        # Memory budget
+        self.memory_budget = 512 * 1024 * 1024      # Bytes for all per-MAC buffers, least recently seen MACs are evicted first
+        self.idle_timeout = 60.0                    # Seconds without frames before a MAC is evicted (0 disables)
+        self.allowlist_only = False                 # Store only allowlisted MACs and the selected one, just count the others
+        self.allowlist : Set[Mac] = set()
+        self.max_seen = 4096                        # MACs tracked in `seen`
+        self.seen : Dict[Mac, MacStats] = {}
+        self.evicted = 0
+        self.last_eviction = 0.0
+
+        # Long history: frames leaving the window are archived to memory-mapped segments on disk
+        self.history_enabled = False
+        self.history_dir = Path(tempfile.gettempdir()) / "csi_history"
+        self.history_quantize = True                # int16 I/Q with a per-frame scale instead of complex64
+        self.history_max_bytes = 4 * 1024 ** 3      # Disk bytes per MAC, oldest segments are deleted first
+
+    def wait_filtered(self):
+        """Block until all pushed frames are filtered and published, e.g. before reading a replayed capture."""
+        self.pipeline.wait()
 
     def get_macs(self):
         with self.mutex:
-            return list(self.csi_data.keys())
+            return list(self.seen.keys())
+
+    def memory_usage(self) -> Dict[Mac, int]:
+        """Resident bytes per stored MAC."""
+        return { mac: entry.nbytes() for mac, entry in list(self.csi_data.items()) }
+
+    def resident_bytes(self) -> int:
+        return sum(self.memory_usage().values())
+
+    def set_memory_budget(self, budget_bytes):
+        with self.mutex:
+            self.memory_budget = budget_bytes
+            self.evict(time.monotonic())
+
+    def set_idle_timeout(self, seconds):
+        with self.mutex:
+            self.idle_timeout = seconds
+            self.evict(time.monotonic())
+
+    def set_allowlist(self, macs, allowlist_only=None):
+        with self.mutex:
+            self.allowlist = set(macs)
+            if allowlist_only is not None:
+                self.allowlist_only = allowlist_only
+            self.evict(time.monotonic())
+
+    def is_stored(self, mac) -> bool:
+        return not self.allowlist_only or mac == self.selected_mac or mac in self.allowlist
+
+    def evict(self, now):
+        """
+        Drop per-MAC buffers that are idle, not allowed, or over the memory budget (least recently seen first).
+        The selected MAC is never evicted. Must be called with the mutex held.
+        """
+        self.last_eviction = now
+        idle = self.idle_timeout
+        for mac in list(self.csi_data):
+            if mac == self.selected_mac:
+                continue
+            last_seen = self.seen[mac]['last_seen'] if mac in self.seen else 0.0
+            if (idle > 0 and now - last_seen > idle) or not self.is_stored(mac):
+                self.drop(mac)
+                self.evicted += 1
+
+        usage = self.memory_usage()
+        total = sum(usage.values())
+        if total > self.memory_budget:
+            for mac in sorted(usage, key=lambda mac: self.seen[mac]['last_seen'] if mac in self.seen else 0.0):
+                if total <= self.memory_budget:
+                    break
+                if mac != self.selected_mac:
+                    self.drop(mac)
+                    total -= usage[mac]
+                    self.evicted += 1
+
+        # Forget idle MACs and keep the counters bounded
+        stale = [mac for mac, stats in self.seen.items() if mac not in self.csi_data and mac != self.selected_mac and
+                 idle > 0 and now - stats['last_seen'] > idle]
+        for mac in stale:
+            del self.seen[mac]
+        if len(self.seen) > self.max_seen:
+            oldest = sorted(self.seen, key=lambda mac: self.seen[mac]['last_seen'])
+            for mac in oldest[:len(self.seen) - self.max_seen]:
+                if mac not in self.csi_data and mac != self.selected_mac:
+                    del self.seen[mac]
+
+    def drop(self, mac):
+        """Remove a MAC's window, its history files and its filter states."""
+        self.filters.forget(mac)
+        entry = self.csi_data.pop(mac)
+        if entry.history is not None:
+            entry.history.clear()
+
+    def drop_all(self):
+        for mac in list(self.csi_data):
+            self.drop(mac)
+
+    def snapshot(self, mac=None) -> CSISnapshot:
+        """
+        Consistent read-only snapshot of a MAC's window (the selected MAC by default), see CSISnapshot.
+        Repeated calls without new data return the same snapshot.
+        """
+        mac = mac or self.selected_mac
+        entry = self.csi_data.get(mac) if mac else None
+        if entry is None:
+            if self.empty_entry is None:
+                self.empty_entry = CSIEntry(self.subcarrier_mask.shape[0], 1)
+            entry = self.empty_entry
+        return entry.snapshot(*self.mask_columns(entry.nfft))
+
+    def get_range(self, t_from, t_to, mac=None) -> CSISnapshot:
+        """
+        Frames with t_from <= ts <= t_to of a MAC (the selected one by default), as views found with the timestamp index.
+        """
+        return self.snapshot(mac).range(t_from, t_to)
+
+    def get_history(self, t_from, t_to, mac=None, max_frames=None) -> HistoryRange:
+        """
+        Frames with t_from <= ts <= t_to of a MAC (the selected one by default) from both the on-disk history
+        and the in-memory window, in chronological order, with the current mask applied. With `max_frames`, frames are strided to at most about that many.
+        Only the requested range is read from disk.
+        """
+        mac = mac or self.selected_mac
+        entry = self.csi_data.get(mac) if mac else None
+        snapshot = self.snapshot(mac)
+        hot = snapshot.range(t_from, t_to)
+        history = entry.history if entry is not None else None
+        cold_count = 0
+        if history is not None:
+            # Cold frames end where the window starts
+            cold_to = min(t_to, np.nextafter(snapshot.ts[0], -np.inf)) if len(snapshot) else t_to
+            cold_count = history.count_range(t_from, cold_to)
+
+        total = len(hot) + cold_count
+        step = -(-total // max_frames) if max_frames and total > max_frames else 1
+        if history is None:
+            return { 'ts': hot.ts[::step], 'raw': hot.raw[::step] }
+        cold = history.get_range(t_from, cold_to, step)
+        return { 'ts': np.concatenate((cold['ts'], hot.ts[::step])), 'raw': np.concatenate((cold['raw'][:, hot.columns], hot.raw[::step])) }
+
+    def history_start(self, mac=None):
+        """Timestamp of the oldest frame still available for a MAC, on disk or in memory, or None."""
+        mac = mac or self.selected_mac
+        entry = self.csi_data.get(mac) if mac else None
+        if entry is None:
+            return None
+        first = entry.history.first_ts() if entry.history is not None else None
+        snapshot = self.snapshot(mac)
+        return first if first is not None else (float(snapshot.ts[0]) if len(snapshot) else None)
+
+    def set_history(self, enabled=None, directory=None, max_bytes=None, quantize=None):
+        """
+        Enable or configure the on-disk history. Changes apply to MACs seen afterwards; disabling deletes existing history.
+        """
+        with self.mutex:
+            self.history_enabled = self.history_enabled if enabled is None else enabled
+            self.history_dir = Path(directory) if directory else self.history_dir
+            self.history_max_bytes = max_bytes or self.history_max_bytes
+            self.history_quantize = self.history_quantize if quantize is None else quantize
+            for entry in self.csi_data.values():
+                if entry.history is None:
+                    continue
+                if not self.history_enabled:
+                    entry.history.clear()
+                    entry.history = None
+                else:
+                    entry.history.max_bytes = self.history_max_bytes
+
+    def set_window(self, frames=None, seconds=None, max_frames=None):
+        """
+        Change the per-MAC window, in frames or in seconds (0 for a frame-based window). Applies to stored MACs too.
+        """
+        with self.mutex:
+            self.window = frames or self.window
+            self.window_seconds = self.window_seconds if seconds is None else seconds
+            self.max_window = max_frames or self.max_window
+            for entry in self.csi_data.values():
+                entry.resize(self.entry_window(), self.window_seconds)
+
+    def entry_window(self):
+        return self.max_window if self.window_seconds > 0 else self.window
+
+    def get_stats(self, mac=None) -> SubcarrierStats:
+        return self.snapshot(mac).stats
 
     def get_amp(self):
-        if self.selected_mac:
-            return self.csi_data[self.selected_mac]['amp']
-        return np.empty((0, self.subcarrier_num))
+        return self.snapshot().amp
 
     def get_phase(self):
-        if self.selected_mac:
-            return self.csi_data[self.selected_mac]['phase']
-        return np.empty((0, self.subcarrier_num))
+        return self.snapshot().phase
+
+    def get_unwrapped_phase(self, sanitize=False):
+        snapshot = self.snapshot()
+        return snapshot.sanitized_phase if sanitize else snapshot.unwrapped_phase
 
     def get_ts(self):
-        return self.csi_data[self.selected_mac]['ts'] if self.selected_mac else []
+        return self.snapshot().ts
 
     def get_mask(self):
         return self.subcarrier_mask
 
     def set_mask(self, mask):
+        """
+        Select the subcarriers returned by reads. Stored frames are full-band, so existing data is kept and
+        masks used before switch back instantly from their caches.
+        """
         with self.mutex:
-            self.subcarrier_mask = np.ones(256, dtype=bool) if mask is None else mask
+            mask = np.ones(256, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+            if self.subcarrier_mask is not None and mask.shape != self.subcarrier_mask.shape:
+                self.drop_all()  # Stored frames have a different FFT size
+            self.subcarrier_mask = mask
             self.subcarrier_num = np.sum(self.subcarrier_mask)
-            self.csi_data = {}  # Clear existing data as it may not match new mask
+            self.gather_index = {}
+            self.mask_cache = {}                    # FFT size → (mask key, columns), see mask_columns
+            self.empty_entry = None
             print(f"CSI mask set. Number of subcarriers: {self.subcarrier_num}")
 
+    def mask_columns(self, nfft):
+        """
+        Cache key and column selection of the current mask for frames of `nfft` subcarriers: a slice when
+        the selected subcarriers are contiguous, so masked raw CSI is a view, else an integer index.
+        """
+        cached = self.mask_cache.get(nfft)
+        if cached is None:
+            mask = self.subcarrier_mask
+            if mask.shape[0] != nfft:
+                return b'', slice(None)
+            columns = np.flatnonzero(mask)
+            if len(columns) and columns[-1] - columns[0] + 1 == len(columns):
+                columns = slice(int(columns[0]), int(columns[-1]) + 1)
+            cached = self.mask_cache[nfft] = (mask.tobytes(), columns)
+        return cached
+
+    def set_fft_shift(self, enabled):
+        with self.mutex:
+            self.shift_fft = enabled
+            self.gather_index = {}
+
+    def get_gather_index(self, nfft):
+        """
+        Integer index that applies fftshift (if enabled) in a single take, built once per FFT size.
+        Returns None if the mask does not match the FFT size.
+        """
+        index = self.gather_index.get(nfft)
+        if index is None:
+            if nfft != self.subcarrier_mask.shape[0]:
+                return None
+            index = self.gather_index[nfft] = np.fft.fftshift(np.arange(nfft)) if self.shift_fft else np.arange(nfft)
+        return index
+
+    def gather(self, csi, out=None, rows=None):
+        """
+        Reorder a frame (nfft,) or a batch of frames (N, nfft), or only `rows` of the batch (a slice or an index
+        array), into `out` for storage. All subcarriers are kept; masks are applied when reading.
+        Returns None if the frames do not match the mask.
+        """
+        index = self.get_gather_index(csi.shape[-1])
+        if index is None:
+            return None
+        if rows is not None:
+            # Rows of one MAC among others are picked first: measured faster than one take with flat indices
+            csi = csi[rows] if isinstance(rows, slice) else np.take(csi, rows, axis=0)
+        return np.take(csi, index, axis=-1, out=out)
+
     def set_reader(self, reader):
         self.reader = reader
 
     def set_selected_mac(self, mac):
         with self.mutex:
-            if mac in self.csi_data:
+            if mac in self.csi_data or mac in self.seen:
                 self.selected_mac = mac
 
     def clear(self):
-        self.csi_data = {}
+        with self.mutex:
+            self.drop_all()
+        self.seen = {}
         self.selected_mac = None
         self.reader.receiver.clear()
     
     def push(self, mac, csi, ts):
-        with self.mutex:
-            if mac not in self.csi_data:
-                self.csi_data[mac] = { 
-                    'raw': np.empty((0, self.subcarrier_num)), 
-                    'amp': np.empty((0, self.subcarrier_num)),
-                    'phase': np.empty((0, self.subcarrier_num)),
-                    'ts': [] 
-                }
+        self.push_many([mac], csi.reshape(1, -1), [ts])
+
+    def push_many(self, macs, csi_block, ts_block):
+        """
+        Push a block of frames from possibly different MACs: macs (N,), csi_block (N, nfft), ts_block (N,).
+        Only raw CSI and timestamps are stored; amplitude and phase are derived when read. When filters are enabled,
+        the new rows are queued to the filter pipeline, which stores the filtered columns and publishes them;
+        otherwise they are published here.
+        """
+        started = time.perf_counter()
+        jobs : List[FilterJob] = []
+        ts_block = np.asarray(ts_block)
+        if ts_block.dtype == object:
+            ts_block = np.array([ts.timestamp() if isinstance(ts, datetime) else ts for ts in ts_block], dtype=np.float64)
 
+        with self.mutex:
             # Control check to ensure CSI array length matches the subcarrier_mask
-            if csi.shape[0] != self.subcarrier_mask.shape[0]:
-                print(f"Skipping frame: mismatched shape {csi.shape[0]} vs {self.subcarrier_mask.shape[0]}")
+            csi_block = np.asarray(csi_block, dtype=np.complex64)
+            nfft = csi_block.shape[-1]
+            if self.get_gather_index(nfft) is None:
+                print(f"Skipping {len(csi_block)} frames: mismatched shape {nfft} vs {self.subcarrier_mask.shape[0]}")
                 return
 
-            raw = csi[self.subcarrier_mask].reshape(1, -1)
-            amp = to_db(raw)
-            phase = np.angle(raw)
+            if len(macs) == 1 or all(mac == macs[0] for mac in macs):
+                groups = [(macs[0], np.arange(len(csi_block)))]
+            else:
+                names, inverse = np.unique(np.asarray(macs, dtype=object), return_inverse=True)
+                groups = [(mac, np.flatnonzero(inverse == i)) for i, mac in enumerate(names)]
+
+            now = time.monotonic()
+            filtering = self.filters.has_enabled()
+            for mac, rows in groups:
+                ts = ts_block[rows]
+                stats = self.seen.get(mac)
+                if stats is None:
+                    stats = self.seen[mac] = { 'frames': 0, 'last_seen': now }
+                stats['frames'] += len(ts)
+                stats['last_seen'] = now
+                if not self.is_stored(mac):
+                    continue
+
+                entry = self.csi_data.get(mac)
+                if entry is None:
+                    entry = self.csi_data[mac] = CSIEntry(nfft, self.entry_window(), self.window_seconds, self.shift_fft)
+                if self.history_enabled and entry.history is None:
+                    entry.history = CSIHistory(self.history_dir / mac.replace(':', ''), entry.nfft,
+                                               self.history_quantize, self.history_max_bytes)
+
+                # Frames are reordered straight into the reserved rows: a single copy per frame for a one-MAC block
+                previous = entry.buffer.state
+                arrays, end, count = entry.buffer.reserve_block(len(rows))
+                kept = rows[len(rows) - count:]
+                self.gather(csi_block, arrays['raw'][end:end + count], kept if len(kept) < len(csi_block) else slice(None))
+                arrays['ts'][end:end + count] = ts[len(ts) - count:]
+                entry.buffer.commit(count)
+                if entry.history is not None:
+                    entry.history.archive(previous, entry.buffer.span()[0])
+                if filtering or entry.pending:
+                    entry.pending += 1
+                    jobs.append({
+                        'mac': mac,
+                        'entry': entry,
+                        'first': entry.buffer.total - count,
+                        'raw': entry.buffer.view('raw')[-count:],
+                        'ts': ts[-count:],
+                        'state': entry.buffer.state,
+                        'queued': started,
+                    })
+                else:
+                    entry.published = entry.buffer.state
 
-            self.csi_data[mac]['raw'] = np.vstack((self.csi_data[mac]['raw'], raw))[-self.window:]
-            self.csi_data[mac]['amp'] = np.vstack((self.csi_data[mac]['amp'], amp))[-self.window:]
-            self.csi_data[mac]['phase'] = np.vstack((self.csi_data[mac]['phase'], phase))[-self.window:]
-            self.csi_data[mac]['ts'].append(ts.timestamp())
-            self.csi_data[mac]['ts'] = self.csi_data[mac]['ts'][-self.window:]
+            if now - self.last_eviction >= 1.0:
+                self.evict(now)
 
-            self.filters.apply_filters(self.csi_data[mac]['amp'], self.csi_data[mac]['phase'], self.csi_data[mac]['ts'])
\ No newline at end of file
+        # Queued outside the mutex, the pipeline takes it to publish and the drop policy may block
+        for job in jobs:
+            self.pipeline.submit(job)
+        self.push_ticks = add_tick(self.push_ticks, time.perf_counter() - started)
@@ -0,0 +1,244 @@
+import threading
+import numpy as np
+import numpy.typing as npt
+from typing import Callable, Dict, Tuple
+
+class CSIBuffer:
+    """
+    Per-MAC store of aligned columns (e.g. raw, ts) keeping the last `window` rows.
+    Rows are appended into arrays of `capacity` rows in O(1); when the end is reached the arrays grow (up to
+    `max_capacity`) or the last window is copied into fresh arrays, so reads are zero-copy chronological views
+    and views already handed out never change.
+    Rows also have an absolute index (rows appended before them), which stays valid across compactions.
+    With `window_seconds` the window is also limited in time, using the sorted `time_column`.
+    """
+
+    def __init__(self, columns: Dict[str, Tuple[tuple, npt.DTypeLike]], window: int, capacity: int = None, initial_capacity: int = 64,
+                 time_column: str = None, window_seconds: float = 0.0):
+        self.columns = columns                                      # name → (row shape, dtype)
+        self.time_column = time_column
+        self.resize(window, capacity, window_seconds)
+        self.capacity = min(initial_capacity, self.max_capacity)    # grows by doubling, so idle MACs stay small
+        self.state = (self.allocate(), 0, 0, 0)                     # (arrays, start, end, absolute index of row 0), replaced as a whole
+
+    def resize(self, window: int, capacity: int = None, window_seconds: float = 0.0):
+        """
+        Change the window (frames, and seconds if > 0). Shrinking takes effect on the next commit.
+        """
+        self.window = window
+        self.window_seconds = window_seconds
+        self.max_capacity = max(capacity or window + max(window // 2, 64), window)
+
+    def allocate(self) -> Dict[str, np.ndarray]:
+        return { name: np.empty((self.capacity, *shape), dtype=dtype) for name, (shape, dtype) in self.columns.items() }
+
+    def __len__(self) -> int:
+        _, start, end, _ = self.state
+        return end - start
+
+    @property
+    def total(self) -> int:
+        """Rows appended since creation, also the absolute index of the next row. Used as write version."""
+        _, _, end, offset = self.state
+        return offset + end
+
+    def span(self) -> Tuple[int, int]:
+        """Absolute index range [first, last) of the rows in the window."""
+        _, start, end, offset = self.state
+        return offset + start, offset + end
+
+    def reset(self, first: int = 0):
+        """Drop all rows; the next appended row gets absolute index `first`. Views handed out stay unchanged."""
+        self.state = (self.allocate(), 0, 0, first)
+
+    def reserve(self, count: int = 1) -> Tuple[Dict[str, np.ndarray], int]:
+        """
+        Make room for `count` more rows and return the arrays with the row to write them at.
+        """
+        arrays, start, end, offset = self.state
+        if end + count > self.capacity:
+            keep = min(end - start, self.window - min(count, self.window))
+            if keep + count > self.capacity // 2:
+                self.capacity = max(2 * self.capacity, keep + count)    # Grow only if the window fills most of it
+            self.capacity = min(self.capacity, self.max_capacity)
+            fresh = self.allocate()
+            for name, array in arrays.items():
+                fresh[name][:keep] = array[end - keep:end]
+            arrays, start, end, offset = fresh, 0, keep, offset + end - keep
+            self.state = (arrays, start, end, offset)
+        return arrays, end
+
+    def append(self, **row):
+        """
+        Append one row given as column=value keyword arguments.
+        """
+        arrays, end = self.reserve(1)
+        for name, value in row.items():
+            arrays[name][end] = value
+        self.commit(1)
+
+    def extend(self, **rows):
+        """
+        Append a block of rows given as column=(N, ...) keyword arguments. Only the last `window` rows are kept.
+        """
+        size = len(next(iter(rows.values())))
+        arrays, end, count = self.reserve_block(size)
+        for name, values in rows.items():
+            arrays[name][end:end + count] = values[size - count:]
+        self.commit(count)
+        return count
+
+    def reserve_block(self, size: int) -> Tuple[Dict[str, np.ndarray], int, int]:
+        """
+        Make room for a block of `size` rows written in place, of which only the last `count` (at most `window`)
+        are kept. Returns (arrays, end, count): write them at arrays[name][end:end + count], then commit(count).
+        """
+        count = min(size, self.window)
+        if count < size:
+            self.reset(self.total + size - count)
+        arrays, end = self.reserve(count)
+        return arrays, end, count
+
+    def commit(self, count: int):
+        """
+        Publish `count` rows written after the current end, trimming the view to the window.
+        """
+        arrays, start, end, offset = self.state
+        end += count
+        start = max(start, end - self.window)
+        if self.window_seconds > 0:
+            ts = arrays[self.time_column]
+            start += int(np.searchsorted(ts[start:end], ts[end - 1] - self.window_seconds))
+        self.state = (arrays, start, end, offset)
+
+    def view(self, name: str) -> np.ndarray:
+        arrays, start, end, _ = self.state
+        return arrays[name][start:end]
+
+    def views(self) -> Dict[str, np.ndarray]:
+        """
+        Views of all columns taken from the same state, so they have the same length.
+        """
+        arrays, start, end, _ = self.state
+        return { name: array[start:end] for name, array in arrays.items() }
+
+    def nbytes(self) -> int:
+        arrays, _, _, _ = self.state
+        return sum(array.nbytes for array in arrays.values())
+
+class DerivedSeries:
+    """
+    Column computed on demand from a CSIBuffer column (e.g. amp from raw), cached by absolute row index.
+    Only rows appended since the last call are computed, so repeated reads without new data cost nothing.
+    The cache keeps some rows beyond the source window, so it can still serve a slightly older source state
+    while another thread has already derived newer rows.
+    """
+
+    def __init__(self, source: CSIBuffer, column: str, fn: Callable[[np.ndarray], np.ndarray], dtype: npt.DTypeLike, shape: tuple = None):
+        self.source = source
+        self.column = column
+        self.fn = fn
+        shape = source.columns[column][0] if shape is None else shape     # Row shape of the output, the source's by default
+        self.buffer = CSIBuffer({ 'value': (shape, dtype) }, source.max_capacity)
+        self.resize()
+        self.lock = threading.Lock()        # get() may be called from the reader and the UI thread
+
+    def get(self, state=None) -> np.ndarray:
+        """
+        Derived rows aligned with a source state (the current one by default), updated up to its last row.
+        """
+        with self.lock:
+            arrays, start, end, offset = self.source.state if state is None else state
+            first, last = offset + start, offset + end
+            if self.buffer.span()[1] < first:
+                self.buffer.reset(first)
+            done_last = self.buffer.span()[1]
+            if done_last < last:
+                self.buffer.extend(value=self.derive(arrays[self.column][done_last - offset:end]))
+
+            done_first, _ = self.buffer.span()
+            if done_first > first:
+                return self.fn(arrays[self.column][start:end])    # Older than the cache, derive a private copy
+            return self.buffer.view('value')[first - done_first:last - done_first]
+
+    def put(self, first: int, values: np.ndarray):
+        """
+        Store values computed elsewhere (e.g. filtered) for the source rows starting at absolute index `first`,
+        instead of deriving them. Earlier rows not cached yet are derived first; rows already cached are kept.
+        """
+        with self.lock:
+            arrays, start, end, offset = self.source.state
+            done_last = self.buffer.span()[1]
+            if done_last < offset + start:
+                self.buffer.reset(offset + start)
+                done_last = offset + start
+            if done_last < first:
+                self.buffer.extend(value=self.derive(arrays[self.column][done_last - offset:first - offset]))
+            elif done_last > first:
+                values = values[done_last - first:]
+            if len(values):
+                self.buffer.extend(value=values)
+
+    def derive(self, rows: np.ndarray) -> np.ndarray:
+        """Derived values of source rows appended after the cached ones."""
+        return self.fn(rows)
+
+    def resize(self):
+        """Follow a resized source."""
+        self.buffer.resize(self.source.max_capacity, self.source.max_capacity + max(self.source.window // 2, 64))
+
+    def nbytes(self) -> int:
+        return self.buffer.nbytes()
+
+class UnwrappedPhase(DerivedSeries):
+    """
+    Phase unwrapped in time, computed incrementally: each new row is unwrapped against the previous cached one,
+    so a block costs O(rows·S) whatever the window. `fn` gives the wrapped phase of source rows (e.g. np.angle,
+    optionally sanitized). The unwrapped values start from the first cached row, so they may differ from
+    np.unwrap over the current window by a multiple of 2π per subcarrier.
+    """
+
+    def __init__(self, source: CSIBuffer, column: str, fn: Callable[[np.ndarray], np.ndarray], shape: tuple = None):
+        self.wrapped = fn
+        self.last_wrapped = None                # wrapped phase of the last cached row
+        super().__init__(source, column, lambda rows: np.unwrap(fn(rows), axis=0), np.float32, shape)
+
+    def derive(self, rows: np.ndarray) -> np.ndarray:
+        phase = self.wrapped(rows)
+        if len(self.buffer) == 0:
+            previous_wrapped, previous = phase[0], phase[0]
+        else:
+            previous_wrapped, previous = self.last_wrapped, self.buffer.view('value')[-1]
+        steps = np.diff(phase, axis=0, prepend=previous_wrapped[None])
+        steps = (steps + np.pi) % (2 * np.pi) - np.pi
+        self.last_wrapped = phase[-1]
+        return previous + np.cumsum(steps, axis=0, dtype=np.float64)
+
+class MaskedColumns(DerivedSeries):
+    """
+    Some columns of another derived series (e.g. the masked subcarriers of the full-band filtered amp), cached
+    like a DerivedSeries so pyramids and statistics can be built on it. Rows are copied from the full series when
+    first read, so values stored there with put() are seen whatever mask was in use when they were stored.
+    """
+
+    def __init__(self, full: DerivedSeries, columns, shape: tuple):
+        self.full = full
+        self.columns = columns
+        super().__init__(full.source, full.column, lambda rows: full.fn(rows)[:, columns], full.buffer.columns['value'][1], shape)
+
+    def get(self, state=None) -> np.ndarray:
+        state = self.source.state if state is None else state
+        rows = self.full.get(state)         # full-band rows of the state, brought up to its last row
+        with self.lock:
+            arrays, start, end, offset = state
+            first, last = offset + start, offset + end
+            if self.buffer.span()[1] < first:
+                self.buffer.reset(first)
+            done_last = self.buffer.span()[1]
+            if done_last < last:
+                self.buffer.extend(value=rows[done_last - first:, self.columns])
+
+            done_first, _ = self.buffer.span()
+            if done_first > first:
+                return rows[:, self.columns]
+            return self.buffer.view('value')[first - done_first:last - done_first]
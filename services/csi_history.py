@@ -0,0 +1,158 @@
+import shutil
+import numpy as np
+import numpy.typing as npt
+from pathlib import Path
+from typing import List, Tuple, TypedDict
+
+class HistoryRange(TypedDict):
+    ts: npt.NDArray[np.float64]        # shape (N,)
+    raw: npt.NDArray[np.complex64]     # shape (N, S)
+
+class HistorySegment:
+    """
+    Fixed-size memory-mapped files holding up to `rows` frames: <name>.ts (float64) and <name>.csi, either complex64
+    or int16 I/Q quantized per row with a float32 scale in <name>.scale.
+    """
+
+    def __init__(self, path: Path, rows: int, subcarriers: int, quantize: bool):
+        self.path = path
+        self.rows = rows
+        self.quantize = quantize
+        self.ts = np.memmap(path.with_suffix('.ts'), dtype=np.float64, mode='w+', shape=(rows,))
+        if quantize:
+            self.data = np.memmap(path.with_suffix('.csi'), dtype=np.int16, mode='w+', shape=(rows, 2 * subcarriers))
+            self.scale = np.memmap(path.with_suffix('.scale'), dtype=np.float32, mode='w+', shape=(rows,))
+        else:
+            self.data = np.memmap(path.with_suffix('.csi'), dtype=np.complex64, mode='w+', shape=(rows, subcarriers))
+            self.scale = None
+        self.count = 0                  # rows written, published after the data
+
+    def append(self, raw: np.ndarray, ts: np.ndarray) -> int:
+        """Append as many rows as fit and return how many were written."""
+        n = min(len(raw), self.rows - self.count)
+        rows = slice(self.count, self.count + n)
+        if self.quantize:
+            iq = raw[:n].view(np.float32)
+            scale = np.abs(iq).max(axis=1, initial=0.0)
+            scale[scale == 0] = 1.0
+            self.data[rows] = np.round(iq * (32767 / scale[:, None]))
+            self.scale[rows] = scale
+        else:
+            self.data[rows] = raw[:n]
+        self.ts[rows] = ts[:n]
+        self.count += n
+        return n
+
+    def read(self, first: int, last: int, step: int = 1) -> np.ndarray:
+        if not self.quantize:
+            return np.array(self.data[first:last:step])
+        iq = self.data[first:last:step].astype(np.float32)
+        iq *= (self.scale[first:last:step] / 32767)[:, None]
+        return iq.view(np.complex64)
+
+    def nbytes(self) -> int:
+        return self.ts.nbytes + self.data.nbytes + (self.scale.nbytes if self.quantize else 0)
+
+    def files(self) -> List[Path]:
+        return [self.path.with_suffix(suffix) for suffix in ('.ts', '.csi', '.scale')]
+
+class CSIHistory:
+    """
+    Cold tier of a MAC's CSI: frames dropped from the in-memory window are appended to memory-mapped segments
+    in `directory`, and read back by time range. The oldest segments are deleted beyond `max_bytes`.
+    """
+
+    def __init__(self, directory: Path, subcarriers: int, quantize: bool = True, max_bytes: int = 4 << 30, segment_rows: int = 1 << 16):
+        self.directory = Path(directory)
+        self.subcarriers = subcarriers
+        self.quantize = quantize
+        self.max_bytes = max_bytes
+        self.segment_rows = segment_rows
+        self.segments : List[HistorySegment] = []
+        self.segment_count = 0
+        self.archived = None            # absolute index of the next row to archive
+        self.trash : List[Path] = []    # files that could not be deleted yet (still mapped on some platforms)
+
+    def archive(self, state, keep_from: int):
+        """
+        Archive the rows of a CSIBuffer state (taken before an append) that are no longer in the window,
+        i.e. whose absolute index is below `keep_from`.
+        """
+        arrays, start, end, offset = state
+        if self.archived is None:
+            self.archived = offset + start
+        first = max(self.archived, offset + start)
+        last = min(keep_from, offset + end)
+        if first < last:
+            self.append(arrays['raw'][first - offset:last - offset], arrays['ts'][first - offset:last - offset])
+        self.archived = max(self.archived, keep_from)
+
+    def append(self, raw: np.ndarray, ts: np.ndarray):
+        while len(raw):
+            if not self.segments or self.segments[-1].count == self.segments[-1].rows:
+                self.add_segment()
+            written = self.segments[-1].append(raw, ts)
+            raw, ts = raw[written:], ts[written:]
+
+    def add_segment(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_count += 1
+        path = self.directory / f"segment_{self.segment_count:05d}"
+        self.segments.append(HistorySegment(path, self.segment_rows, self.subcarriers, self.quantize))
+
+        # Retention
+        while len(self.segments) > 1 and self.nbytes() > self.max_bytes:
+            self.trash.extend(self.segments.pop(0).files())
+        self.empty_trash()
+
+    def empty_trash(self):
+        remaining = []
+        for file in self.trash:
+            try:
+                file.unlink(missing_ok=True)
+            except OSError:
+                remaining.append(file)
+        self.trash = remaining
+
+    def nbytes(self) -> int:
+        return sum(segment.nbytes() for segment in self.segments)
+
+    def locate(self, t_from: float, t_to: float) -> List[Tuple[HistorySegment, int, int]]:
+        """Rows [first, last) of each segment with t_from <= ts <= t_to, found with the segment timestamps."""
+        found = []
+        for segment in list(self.segments):
+            count = segment.count
+            if count == 0 or segment.ts[0] > t_to or segment.ts[count - 1] < t_from:
+                continue
+            first = int(np.searchsorted(segment.ts[:count], t_from))
+            last = int(np.searchsorted(segment.ts[:count], t_to, side='right'))
+            found.append((segment, first, last))
+        return found
+
+    def count_range(self, t_from: float, t_to: float) -> int:
+        return sum(last - first for _, first, last in self.locate(t_from, t_to))
+
+    def get_range(self, t_from: float, t_to: float, step: int = 1) -> HistoryRange:
+        """
+        Frames with t_from <= ts <= t_to, keeping every `step`-th one. Only those rows are read from the mapped files.
+        """
+        ts_parts, raw_parts = [], []
+        for segment, first, last in self.locate(t_from, t_to):
+            ts_parts.append(np.array(segment.ts[first:last:step]))
+            raw_parts.append(segment.read(first, last, step))
+
+        if not ts_parts:
+            return { 'ts': np.empty(0, dtype=np.float64), 'raw': np.empty((0, self.subcarriers), dtype=np.complex64) }
+        return { 'ts': np.concatenate(ts_parts), 'raw': np.concatenate(raw_parts) }
+
+    def first_ts(self) -> float:
+        segments = list(self.segments)
+        return float(segments[0].ts[0]) if segments and segments[0].count else None
+
+    def clear(self):
+        for segment in self.segments:
+            self.trash.extend(segment.files())
+        self.segments = []
+        self.empty_trash()
+        if not self.trash:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,75 @@
+import threading
+import numpy as np
+from typing import Dict, List
+from services.csi_buffer import CSIBuffer, DerivedSeries
+
+class DecimationPyramid:
+    """
+    Min/max/mean of a derived column (e.g. amp) over blocks of 2, 4, 8 … frames, one CSIBuffer per level.
+    Block j of level k covers the rows with absolute index [j·2^k, (j+1)·2^k), so levels stay aligned with the
+    source across compactions. Like DerivedSeries, only blocks completed since the last read are computed,
+    each from two blocks of the level below, so reading any level costs O(new frames).
+    """
+
+    def __init__(self, series: DerivedSeries, levels: int = 10):
+        self.series = series
+        self.source = series.source
+        shape, dtype = series.buffer.columns['value']
+        self.levels : List[CSIBuffer] = [CSIBuffer({
+            'min': (shape, dtype),
+            'max': (shape, dtype),
+            'mean': (shape, dtype),
+            'ts': ((), np.float64),         # timestamp of the first frame of the block
+        }, 1) for _ in range(levels)]
+        self.resize()
+        self.lock = threading.Lock()
+
+    def resize(self):
+        """Follow a resized source."""
+        for k, level in enumerate(self.levels, start=1):
+            level.resize((self.series.buffer.window >> k) + 1)
+
+    def level_for(self, frames: int, width: int) -> int:
+        """Smallest level (0 for full resolution) with at most `width` blocks for `frames` frames."""
+        level = 0
+        while level < len(self.levels) and frames >> level > width:
+            level += 1
+        return level
+
+    def get(self, state, level: int) -> Dict[str, np.ndarray]:
+        """
+        Blocks of `level` (1-based) fully inside a source state, updated up to its last row.
+        Returns min, max, mean (N, S) and ts (N,) views.
+        """
+        with self.lock:
+            arrays, start, end, offset = state
+            first, last = offset + start, offset + end
+            values = self.series.get(state)
+            below = { 'min': values, 'max': values, 'mean': values, 'ts': arrays['ts'][start:end] }
+            below_first = first
+            for k in range(1, level + 1):
+                buffer = self.levels[k - 1]
+                block_first, block_last = -(-first >> k), last >> k
+                done = buffer.span()[1]
+                if done < block_first:
+                    buffer.reset(block_first)
+                    done = block_first
+                if done < block_last:
+                    # Blocks [done, block_last) of this level are made of blocks [2·done, 2·block_last) of the one below
+                    rows = slice(2 * done - below_first, 2 * block_last - below_first)
+                    pairs = { name: column[rows] for name, column in below.items() }
+                    count = block_last - done
+                    buffer.extend(
+                        min=pairs['min'].reshape(count, 2, -1).min(axis=1),
+                        max=pairs['max'].reshape(count, 2, -1).max(axis=1),
+                        mean=pairs['mean'].reshape(count, 2, -1).mean(axis=1),
+                        ts=pairs['ts'][::2])
+
+                done_first, _ = buffer.span()
+                block_first = max(block_first, done_first)
+                below = { name: view[block_first - done_first:block_last - done_first] for name, view in buffer.views().items() }
+                below_first = block_first
+            return below
+
+    def nbytes(self) -> int:
+        return sum(level.nbytes() for level in self.levels)
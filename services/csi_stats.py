@@ -0,0 +1,88 @@
+import threading
+import numpy as np
+import numpy.typing as npt
+from typing import TypedDict
+from services.csi_buffer import DerivedSeries
+
+class SubcarrierStats(TypedDict):
+    count: int                          # frames in the window
+    mean: npt.NDArray[np.float64]       # shape (S,)
+    var: npt.NDArray[np.float64]        # shape (S,), population variance
+    energy: npt.NDArray[np.float64]     # shape (S,), sum of squares
+    min: npt.NDArray[np.float32]        # shape (S,)
+    max: npt.NDArray[np.float32]        # shape (S,)
+
+class RunningStats:
+    """
+    Per-subcarrier sum, sum of squares, min and max of a derived series (e.g. amp) over the source window.
+    On read, rows appended since the last read are added and rows that left the window are subtracted, so
+    the cost is O(S) per changed row instead of O(window·S). Min/max columns whose extreme left the window
+    are recomputed alone. Sums are recomputed from scratch every `resum_rows` rows to bound float drift.
+    """
+
+    def __init__(self, series: DerivedSeries, resum_rows: int = 1 << 16):
+        self.series = series
+        self.resum_rows = resum_rows
+        self.first = self.last = 0          # absolute row range [first, last) the sums cover
+        self.updated = 0                    # rows added or removed since the last full summation
+        self.sum = self.sumsq = self.min = self.max = None
+        self.lock = threading.Lock()
+
+    def get(self, state) -> SubcarrierStats:
+        """Statistics of the rows of a source state."""
+        with self.lock:
+            arrays, start, end, offset = state
+            first, last = offset + start, offset + end
+            values = self.series.get(state)
+            if self.sum is None or not self.update(values, first, last):
+                self.resum(values, first, last)
+
+            count = last - first
+            mean = self.sum / max(count, 1)
+            return {
+                'count': count,
+                'mean': mean,
+                'var': np.maximum(self.sumsq / max(count, 1) - mean ** 2, 0.0),
+                'energy': self.sumsq.copy(),
+                'min': self.min.copy(),
+                'max': self.max.copy(),
+            }
+
+    def resum(self, values: np.ndarray, first: int, last: int):
+        self.sum = values.sum(axis=0, dtype=np.float64)
+        self.sumsq = np.einsum('ij,ij->j', values, values, dtype=np.float64)
+        self.min = values.min(axis=0, initial=np.inf).astype(values.dtype)
+        self.max = values.max(axis=0, initial=-np.inf).astype(values.dtype)
+        self.first, self.last = first, last
+        self.updated = 0
+
+    def update(self, values: np.ndarray, first: int, last: int) -> bool:
+        """
+        Move the sums from [self.first, self.last) to [first, last). Returns False if a full summation is needed.
+        """
+        if first < self.first or last < self.last or first > self.last or self.updated >= self.resum_rows:
+            return False
+        cache_first, _ = self.series.buffer.span()
+        if self.first < cache_first:
+            return False                    # Rows leaving the window are no longer cached
+        if first == self.first and last == self.last:
+            return True
+
+        removed = self.series.buffer.view('value')[self.first - cache_first:first - cache_first]
+        added = values[self.last - first:]
+        self.sum += added.sum(axis=0, dtype=np.float64) - removed.sum(axis=0, dtype=np.float64)
+        self.sumsq += np.einsum('ij,ij->j', added, added, dtype=np.float64) - np.einsum('ij,ij->j', removed, removed, dtype=np.float64)
+
+        if len(removed):
+            stale = (removed.min(axis=0) <= self.min) | (removed.max(axis=0) >= self.max)
+            if stale.any():
+                columns = values[:, stale]
+                self.min[stale] = columns.min(axis=0, initial=np.inf)
+                self.max[stale] = columns.max(axis=0, initial=-np.inf)
+        if len(added):
+            np.minimum(self.min, added.min(axis=0), out=self.min)
+            np.maximum(self.max, added.max(axis=0), out=self.max)
+
+        self.first, self.last = first, last
+        self.updated += len(added) + len(removed)
+        return True
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+import numpy as np
+from typing import List, TypedDict
+
+DROP_POLICIES = ['drop_oldest', 'drop_newest', 'block']
+
+class FilterJob(TypedDict):
+    mac: str                        # stream the filter states are kept for
+    entry: object                   # CSIEntry the rows belong to, receiving the filtered rows
+    first: int                      # absolute index of the first row
+    raw: np.ndarray                 # shape (N, nfft), view of the stored rows
+    ts: np.ndarray                  # shape (N,)
+    state: tuple                    # buffer state to publish once the rows are filtered
+    queued: float                   # time.perf_counter() when queued
+
+def add_tick(ticks: np.ndarray, value: float) -> np.ndarray:
+    ticks = np.roll(ticks, -1)
+    ticks[-1] = value
+    return ticks
+
+class FilterPipeline(threading.Thread):
+    """
+    Filter stage between ingestion and readers: CSI.push_many stores raw rows and queues them here, and this thread
+    runs the filter chain on batches of queued blocks and publishes them, so filters never run under CSI.mutex
+    or on the reader thread. The queue is bounded; when it is full `policy` either drops the oldest or the newest
+    block (its rows are then published unfiltered) or blocks the reader until there is room.
+    """
+
+    def __init__(self, csi, max_depth: int = 256, policy: str = 'drop_oldest', batch_size: int = 32):
+        super().__init__(name="FilterPipeline", daemon=True)
+        self.csi = csi
+        self.queue : queue.Queue[FilterJob] = queue.Queue(max_depth)
+        self.policy = policy
+        self.batch_size = batch_size            # Jobs drained per round
+        self.dropped = 0                        # Blocks published without filtering
+        self.max_seen_depth = 0
+        self.wait_ticks : np.ndarray = np.zeros(100)      # Seconds queued, last 100 batches
+        self.filter_ticks : np.ndarray = np.zeros(100)    # Seconds in the filter chain, last 100 batches
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def max_depth(self) -> int:
+        return self.queue.maxsize
+
+    def set_max_depth(self, depth: int):
+        with self.queue.mutex:
+            self.queue.maxsize = depth
+
+    def set_policy(self, policy: str):
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{policy}', expected one of {', '.join(DROP_POLICIES)}")
+        self.policy = policy
+
+    def submit(self, job: FilterJob):
+        """
+        Queue a block, applying the drop policy if the queue is full. Must be called without CSI.mutex held.
+        """
+        if not self.is_alive():
+            self.start()
+        if self.policy == 'block':
+            self.queue.put(job)
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(job)
+                    break
+                except queue.Full:
+                    if self.policy == 'drop_newest':
+                        self.publish(job, dropped=True)
+                        break
+                    try:
+                        self.publish(self.queue.get_nowait(), dropped=True)
+                        self.queue.task_done()
+                    except queue.Empty:
+                        pass
+        self.max_seen_depth = max(self.max_seen_depth, self.queue.qsize())
+
+    def run(self):
+        while True:
+            jobs = [self.queue.get()]
+            while len(jobs) < self.batch_size:
+                try:
+                    jobs.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            now = time.perf_counter()
+            self.wait_ticks = add_tick(self.wait_ticks, now - jobs[0]['queued'])
+            for runs in self.rounds(self.contiguous_runs(jobs)):
+                try:
+                    blocks = []
+                    for run in runs:
+                        raw = run[0]['raw'] if len(run) == 1 else np.concatenate([job['raw'] for job in run])
+                        ts = run[0]['ts'] if len(run) == 1 else np.concatenate([job['ts'] for job in run])
+                        blocks.append((run[0]['mac'], *run[0]['entry'].unfiltered(raw), ts))
+                    for run, (amp, phase) in zip(runs, self.csi.filters.process_streams(blocks)):
+                        run[0]['entry'].put_filtered(run[0]['first'], amp, phase)
+                except Exception as e:
+                    print(f"❌ Filter pipeline error: {e}")
+                for run in runs:
+                    for job in run:
+                        self.publish(job)
+                        self.queue.task_done()
+            self.filter_ticks = add_tick(self.filter_ticks, time.perf_counter() - now)
+
+    def wait(self):
+        """Block until every queued block is filtered and published."""
+        self.queue.join()
+
+    def contiguous_runs(self, jobs: List[FilterJob]) -> List[List[FilterJob]]:
+        """Group consecutive jobs of the same entry whose rows follow each other, to filter them in one call."""
+        runs = []
+        for job in jobs:
+            previous = runs[-1][-1] if runs else None
+            if previous is not None and previous['entry'] is job['entry'] and previous['first'] + len(previous['ts']) == job['first']:
+                runs[-1].append(job)
+            else:
+                runs.append([job])
+        return runs
+
+    def rounds(self, runs: List[List[FilterJob]]) -> List[List[List[FilterJob]]]:
+        """Split runs into rounds with at most one run per MAC, keeping each MAC's order, to filter a round in one call."""
+        rounds = []
+        for run in runs:
+            mac = run[0]['mac']
+            done = max((i + 1 for i, round in enumerate(rounds) if any(other[0]['mac'] == mac for other in round)), default=0)
+            if done == len(rounds):
+                rounds.append([])
+            rounds[done].append(run)
+        return rounds
+
+    def publish(self, job: FilterJob, dropped: bool = False):
+        """
+        Make a job's rows visible to readers. Once an entry has no more queued jobs, its latest state is published,
+        which also covers rows of dropped blocks.
+        """
+        with self.csi.mutex:
+            entry = job['entry']
+            entry.pending -= 1
+            self.dropped += dropped
+            state = entry.buffer.state if entry.pending == 0 else job['state']
+            _, _, end, offset = state
+            _, _, published_end, published_offset = entry.published
+            if offset + end > published_offset + published_end:
+                entry.published = state
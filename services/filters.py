@@ -1,16 +1,21 @@
 import numpy as np
 import numpy.typing as npt
 from pathlib import Path
-from typing import List
+from typing import Dict, Hashable, List, Tuple
 import importlib
+import threading
 import time
 from importlib.machinery import ModuleSpec
 import importlib.util
-from filters.filter_base import Filter
+from filters.filter_base import Filter, FilterState
 
 class Filters():
     def __init__(self):
         self.filters : List[Filter] = []
+        self.states : Dict[Hashable, Dict[Filter, FilterState]] = {}    # stream (MAC) → filter → state
+        self.forgotten : List[Hashable] = []                             # streams whose states are waiting to be released
+        self.lock = threading.Lock()                                     # held while the filters run
+        self.errors : Dict[Filter, str] = {}                             # last error of each failing filter, printed once
 
     def add_filter(self, filter: Filter):
         self.filters.append(filter)
@@ -18,13 +23,57 @@ class Filters():
     def get_filters(self):
         return self.filters
 
-    def apply_filters(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: List[float]):
-        for filter in self.filters:
-            start = time.perf_counter()
-            if filter.is_enabled():
-                filter.apply(amp, phase, ts)
-            elapsed = time.perf_counter() - start
-            filter.add_performance_time(elapsed)
+    def has_enabled(self) -> bool:
+        return any(filter.is_enabled() for filter in self.filters)
+
+    def process(self, amp: npt.NDArray[np.float32], phase: npt.NDArray[np.float32], ts: npt.NDArray[np.float64], stream: Hashable = None) -> Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32]]:
+        """
+        Run the enabled filters in order on a block of new rows (N, S) of a stream and return the filtered (amp, phase).
+        """
+        return self.process_streams([(stream, amp, phase, ts)])[0]
+
+    def process_streams(self, blocks: List[Tuple[Hashable, npt.NDArray[np.float32], npt.NDArray[np.float32], npt.NDArray[np.float64]]]) -> List[Tuple[npt.NDArray[np.float32], npt.NDArray[np.float32]]]:
+        """
+        Run the enabled filters in order on new blocks (stream, amp, phase, ts) of distinct streams, each stream
+        with its own filter state, and return the filtered (amp, phase) of each block. A filter raising an error is
+        skipped for the round, so its input is passed on unchanged.
+        """
+        with self.lock:
+            results = [(amp, phase) for _, amp, phase, _ in blocks]
+            for filter in self.filters:
+                start = time.perf_counter()
+                if filter.is_enabled():
+                    try:
+                        results = filter.process_streams([(amp, phase, ts, self.states.setdefault(stream, {}).setdefault(filter, {}))
+                                                          for (stream, _, _, ts), (amp, phase) in zip(blocks, results)])
+                        self.errors.pop(filter, None)
+                    except Exception as e:
+                        # A failing filter is skipped for this round, the other filters still run on every stream
+                        if self.errors.get(filter) != str(e):
+                            self.errors[filter] = str(e)
+                            print(f"❌ Filter {filter.name} failed, skipping it: {e}")
+                elapsed = time.perf_counter() - start
+                filter.add_performance_time(elapsed)
+        self.release_forgotten()
+        return results
+
+    def forget(self, stream: Hashable):
+        """
+        Drop the filter states of a stream, e.g. an evicted MAC. Safe to call while another thread is filtering:
+        the states are then released as soon as that run ends.
+        """
+        self.forgotten.append(stream)
+        self.release_forgotten()
+
+    def release_forgotten(self):
+        # Never waits for a running filter round, which releases the states itself once it is done
+        while self.forgotten and self.lock.acquire(blocking=False):
+            try:
+                while self.forgotten:
+                    for filter, state in self.states.pop(self.forgotten.pop(), {}).items():
+                        filter.release(state)
+            finally:
+                self.lock.release()
 
     def load_filters(self, directory: Path):
         for filter_file in directory.iterdir():
@@ -69,15 +69,16 @@ class Models():
         if not model:
             return
         
-        amp = csi.get_amp()
-        ts = csi.get_ts()
+        snapshot = csi.snapshot()
+        ts = snapshot.ts
 
         # If no data or no new data, skip prediction
-        if amp.shape[0] == 0 or self.last_prediction == ts[-1]:
+        if len(ts) == 0 or self.last_prediction == ts[-1]:
             return
 
         self.last_prediction = ts[-1]
-        ts_from, ts_to, confidence_scores = model.evaluate(amp, ts)
+        window = snapshot.range(ts[-1] - model.window_seconds, ts[-1])
+        ts_from, ts_to, confidence_scores = model.evaluate(window.amp, window.ts)
         self.predictions.append((ts_from, ts_to, confidence_scores))
         print(f"Model {model.get_name()} evaluated at {ts_from} - {ts_to} with scores: {confidence_scores}")
 
@@ -1,5 +1,6 @@
 import numpy as np
-from scipy.signal import butter, filtfilt
+from functools import lru_cache
+from scipy.signal import butter, filtfilt, sosfilt, sosfilt_zi
 
 def get_used_subcarriers():
     # Define the full range of 256 subcarrier indices, centered around 0 (like in FFT)
@@ -34,6 +35,19 @@ def to_db(csi):
     amp[amp == 0] = 1  # Avoid log(0)
     return 20 * np.log10(amp)
 
+def sanitize_phase(phase, frequencies):
+    """
+    Remove the linear phase (STO slope and CFO offset) of each frame (..., S) by a least squares fit over the
+    subcarrier frequencies (S,), after unwrapping across subcarriers.
+    """
+    order = np.argsort(frequencies)
+    freqs = frequencies[order] - np.mean(frequencies)
+    phase = np.unwrap(phase[..., order], axis=-1)
+    slope = (phase @ freqs) / max(float(freqs @ freqs), 1e-12)
+    sanitized = np.empty_like(phase)
+    sanitized[..., order] = phase - np.mean(phase, axis=-1, keepdims=True) - slope[..., None] * freqs
+    return sanitized
+
 def lowpass_filter(csi, cutoff=3.0, fs=100.0, order=4):
     """
     Apply a low-pass Butterworth filter to CSI data.
@@ -47,9 +61,63 @@ def lowpass_filter(csi, cutoff=3.0, fs=100.0, order=4):
     Returns:
         ndarray: Smoothed CSI data of same shape.
     """
-    nyq = 0.5 * fs  # Nyquist frequency
-    normal_cutoff = cutoff / nyq
-    b, a = butter(order, normal_cutoff, btype='low', analog=False)
+    b, a = butter_coefficients(order, cutoff, fs, 'low')
 
     # Apply along time (axis=0)
     return filtfilt(b, a, csi, axis=0)
+
+@lru_cache(maxsize=64)
+def butter_coefficients(order, cutoff, fs, btype='low'):
+    """Butterworth (b, a) for a cutoff in Hz (a (low, high) tuple for band-pass), cached per parameters."""
+    nyq = 0.5 * fs  # Nyquist frequency
+    normal_cutoff = tuple(c / nyq for c in cutoff) if isinstance(cutoff, tuple) else cutoff / nyq
+    return butter(order, normal_cutoff, btype=btype, analog=False)
+
+@lru_cache(maxsize=64)
+def butter_sos(order, cutoff, fs, btype='low'):
+    """
+    Butterworth second-order sections for a cutoff in Hz (a (low, high) tuple for band-pass), cached per parameters.
+    Raises ValueError unless 0 < cutoff < fs/2 (and low < high). The array is shared, do not modify it.
+    """
+    nyq = 0.5 * fs  # Nyquist frequency
+    if isinstance(cutoff, tuple):
+        if not 0 < cutoff[0] < cutoff[1] < nyq:
+            raise ValueError(f"Invalid band {cutoff[0]:g}-{cutoff[1]:g} Hz for a {fs:g} Hz stream, expected 0 < low < high < {nyq:g} Hz")
+        normal_cutoff = tuple(c / nyq for c in cutoff)
+    else:
+        if not 0 < cutoff < nyq:
+            raise ValueError(f"Invalid cutoff {cutoff:g} Hz for a {fs:g} Hz stream, expected 0 < cutoff < {nyq:g} Hz")
+        normal_cutoff = cutoff / nyq
+    return butter(order, normal_cutoff, btype=btype, analog=False, output='sos')
+
+def stream_rate(ts, state, tolerance=0.1):
+    """
+    Frame rate (Hz) of a stream from the timestamps of its blocks, or None until two frames were seen. The last
+    timestamp and the rate are kept in the `state` dict. The rate is a running mean of the frame interval, rounded
+    to 3 significant digits and only updated when it moves by more than `tolerance`, so jitter does not keep
+    changing the coefficients derived from it.
+    """
+    ts = np.asarray(ts, dtype=np.float64)
+    intervals = np.diff(ts, prepend=state['last_ts']) if 'last_ts' in state else np.diff(ts)
+    intervals = intervals[intervals > 0]
+    if len(ts):
+        state['last_ts'] = ts[-1]
+    if len(intervals):
+        weight = 1 - 0.95 ** len(intervals)
+        interval = state.get('interval', np.mean(intervals))
+        state['interval'] = interval = (1 - weight) * interval + weight * np.mean(intervals)
+        fs = float(f'{1.0 / interval:.3g}')
+        if 'fs' not in state or abs(fs - state['fs']) > tolerance * state['fs']:
+            state['fs'] = fs
+    return state.get('fs')
+
+def sosfilt_stream(sos, x, state):
+    """
+    Causal filtering of a block x (N, ...) along time, continuing from the previous block: the filter delays `zi`
+    are kept in the `state` dict and reset when the coefficients change. The first block starts in steady state.
+    """
+    if state.get('sos') is not sos or state['zi'].shape[2:] != x.shape[1:]:
+        state['sos'] = sos
+        state['zi'] = sosfilt_zi(sos).reshape(sos.shape[0], 2, *([1] * (x.ndim - 1))) * x[0]
+    y, state['zi'] = sosfilt(sos, x, axis=0, zi=state['zi'])
+    return y